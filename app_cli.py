@@ -1,12 +1,21 @@
 #                            TASK MANAGER COMMAND LINE INTERFACE APPLICATION (v1.0.0)
 
+import argparse
 import sys
 from datetime import datetime
 
-from task_logic.task import Task
-from task_logic.task_json import TaskJSON
+from task_logic.task import Task, bucket_deadlines, format_datetime
+from task_logic.task_archive import ARCHIVE_TYPE
+from task_logic.task_ndjson import export_ndjson, import_ndjson
+from task_logic.task_rollover import DailyRollover
+from task_logic.task_storage import open_storage
 
-database = TaskJSON()
+database = open_storage()  # backend from TASK_STORAGE (json/sqlite)
+rollover = DailyRollover(database)  # resets the finished daily tasks each new day
+
+# Task list paging and sorting.
+PAGE_SIZE = 20
+SORT_OPTIONS = ['id', 'deadline', 'created_at', 'title', 'finished']
 
 # ==================================================================
 # Input helpers
@@ -70,15 +79,17 @@ def ask_for_task_id_and_validate():
 #                           Functions:
 # add_task() -> Create and save a new task
 # edit_task() -> Edit a task
-# show_all_tasks() -> List tasks by type (daily/overall)
+# show_all_tasks() -> List tasks by type (daily/overall), one page at a time
 # show_task() -> Show full task details by ID
+# search_tasks() -> List the tasks matching a text query
+# show_deadlines() -> List overdue, due-soon or next-due tasks
 # ==================================================================
 
 def add_task():
     """Create and save a new task."""
     
     task = Task(*ask_task_information(ask_type=True))  # " *ask_task_information() " unpacks into individual arguments
-    database.add_task(task.to_dict(), task.type)
+    database.add_task(task, task.type)
     print("\nTask added successfully.")
 
 
@@ -88,38 +99,101 @@ def edit_task(task_id, task_type):
     print(f'\nEDITING TASK ID "{task_id}"')
     task = Task(*ask_task_information(ask_type=False, task_type=task_type))
     task.id = task_id 
-    database.edit_task(task.to_dict(), task_type)
+    if database.edit_task(task, task_type):
+        print("\nTask edited successfully.")
+    else:
+        print("\nA task with this title already exists. The task was not changed.")
     
 
-def show_all_tasks(task_type):
-    """List tasks by type (daily/overall)."""
-    
-    tasks_list = database.get_tasks_by_type(task_type)
-    
-    if not tasks_list:
-        print(f"\tNo {task_type} tasks found.")
-        return
+def show_all_tasks(task_type, sort_by: str = 'id', descending: bool = False,
+                   tags: list | None = None, match_all: bool = True):
+    """List tasks by type (daily/overall), one page at a time."""
     
-    print(f"\nAvailable {task_type} tasks:")
-    print("\t(ID). (Title)")
-    for task in tasks_list:
-        print(f"\t{task['id']}. {task['title']}")
+    page = 0
+    while True:
+        tasks_list, total = database.get_tasks_page(task_type, sort_by, descending,
+                                                    page * PAGE_SIZE, PAGE_SIZE,
+                                                    tags=tags, match_all=match_all)
+        if not total:
+            print(f"\tNo {task_type} tasks found.")
+            return
+        
+        pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        tag_filter = f", tags: {(' AND ' if match_all else ' OR ').join(tags)}" if tags else ""
+        print(f"\nAvailable {task_type} tasks (page {page + 1}/{pages}, sorted by {sort_by}{tag_filter}):")
+        print("\t(ID). (Title)")
+        for task in tasks_list:
+            print(f"\t{task.id}. {task.title}")
+        
+        if pages == 1:
+            return
+        choice = input("[n]ext page, [p]revious page, or Enter to continue: ").lower().strip()
+        if choice == "n" and page + 1 < pages:
+            page += 1
+        elif choice == "p" and page > 0:
+            page -= 1
+        elif not choice:
+            return
 
 
 def show_task(task_id):
     """Show full task details by ID."""
     
     task, task_type = database.get_task_by_id(task_id)
-    print(f'\nSHOWING TASK ID "{task["id"]}"')
+    print(f'\nSHOWING TASK ID "{task.id}"')
     print(f"\tTASK TYPE: {task_type}")
-    print(f"\tTITLE: {task['title']}")
-    print(f"\tDESCRIPTION: {task['description']}")
-    print(f"\tTAGS: {task['tags']}")
-    print(f"\tCREATED AT: {task['created_at']}")
-    print(f"\tDEADLINE: {task['deadline']}" if task['deadline'] else "\tDEADLINE: NO DEADLINE.")
-    print(f"\tFINISHED: {task['finished']}")
-    if task['finished']:
-        print(f"\tFINISHED AT: {task['finished_at']}")
+    print(f"\tTITLE: {task.title}")
+    print(f"\tDESCRIPTION: {task.description}")
+    print(f"\tTAGS: {task.tags}")
+    print(f"\tCREATED AT: {format_datetime(task.created_at)}")
+    print(f"\tDEADLINE: {format_datetime(task.deadline)}" if task.deadline else "\tDEADLINE: NO DEADLINE.")
+    print(f"\tFINISHED: {task.finished}")
+    if task.finished:
+        print(f"\tFINISHED AT: {format_datetime(task.finished_at)}")
+
+def search_tasks():
+    """List the tasks matching a text query."""
+    
+    query = input("\nSearch for: ").strip()
+    task_type = input(f"Search in (daily/overall/{ARCHIVE_TYPE}, empty for daily and overall): ").lower().strip()
+    if task_type not in ["daily", "overall", ARCHIVE_TYPE]:
+        task_type = None
+    results = database.search_tasks(query, task_type, limit=PAGE_SIZE)
+    if not results:
+        print("\tNo matching tasks found.")
+        return
+    
+    print(f'\nTasks matching "{query}" (best first):')
+    print("\t(ID). [Type] (Title)")
+    for task in results:
+        print(f"\t{task.id}. [{task.type}] {task.title}")
+
+def show_deadlines():
+    """List overdue, due-soon or next-due tasks."""
+    
+    print("\nDeadline views:")
+    print("\t1. Overdue tasks")
+    print("\t2. Tasks due in the next 24 hours")
+    print("\t3. Next 10 deadlines")
+    choice = input("Choose view: ")
+    
+    if choice == "1":
+        tasks_list, title = database.get_overdue_tasks(), "Overdue tasks"
+    elif choice == "2":
+        tasks_list, title = database.get_tasks_due_within(24), "Tasks due in the next 24 hours"
+    elif choice == "3":
+        tasks_list, title = database.get_next_deadlines(10), "Next 10 deadlines"
+    else:
+        print("\nInvalid option.")
+        return
+    
+    if not tasks_list:
+        print("\tNo matching tasks found.")
+        return
+    print(f"\n{title}:")
+    print("\t(ID). (Deadline) (Title)")
+    for task in tasks_list:
+        print(f"\t{task.id}. {format_datetime(task.deadline)} {task.title}")
 
 # ==================================================================
 # Menus
@@ -129,13 +203,16 @@ def show_task(task_id):
 # main() -> Main application menu
 # ==================================================================
 
-def task_menu(task_type):
+def task_menu(task_type, sort_by: str = 'id', descending: bool = False,
+              tags: list | None = None, match_all: bool = True):
     """Submenu for showing tasks and performing operations on them."""
-    show_all_tasks(task_type)
+    show_all_tasks(task_type, sort_by, descending, tags, match_all)
 
     print("\nAvailable operations:")
     print("\t0. BACK TO MAIN MENU")
     print("\t1. Show task information by ID")
+    print("\t2. Change sort order")
+    print("\t3. Filter by tags")
 
     choice = input("Choose operation: ")
 
@@ -144,6 +221,18 @@ def task_menu(task_type):
     elif choice == "1": #Done
         task_id = ask_for_task_id_and_validate()
         single_task_menu(task_id)
+    elif choice == "2":
+        sort_by = input(f"Sort by ({'/'.join(SORT_OPTIONS)}): ").lower().strip()
+        if sort_by not in SORT_OPTIONS:
+            print("\nInvalid sort key.")
+            return
+        descending = input("Descending? (y/n): ").lower().strip() == "y"
+        task_menu(task_type, sort_by, descending, tags, match_all)
+    elif choice == "3":
+        print(f"\nAvailable tags: {', '.join(database.get_tags())}")
+        tags = [tag.strip() for tag in input("Tags (comma separated, empty to clear): ").split(",") if tag.strip()]
+        match_all = input("Match all tags? (y/n): ").lower().strip() != "n" if tags else True
+        task_menu(task_type, sort_by, descending, tags, match_all)
     else: #Done
         print("\nInvalid option.")
 
@@ -153,6 +242,9 @@ def single_task_menu(task_id):
     show_task(task_id)
 
     task, task_type = database.get_task_by_id(task_id)
+    if task_type == ARCHIVE_TYPE:
+        print("\nArchived tasks are read-only.")
+        return
 
     print(f"\nAvailable operations for task {task_id}:")
     print("\t0. BACK TO MAIN MENU")
@@ -179,18 +271,24 @@ def single_task_menu(task_id):
 
 def main():
     """Main application menu."""
-    database.reset_daily_finished()  # reset daily finished tasks if needed
+    rollover.start()  # resets finished daily tasks now and at every midnight the menu stays open
     while True:
+        rollover.check()  # in case the midnight timer has not fired yet
         count_daily_tasks = database.get_tasks_count("daily")
         count_overall_tasks = database.get_tasks_count("overall")
+        deadlines = bucket_deadlines(database.get_tasks_by_type("overall"))
         print("\n========================")
         print(f"Main Menu: (Daily: {count_daily_tasks} - Overall: {count_overall_tasks})")
+        print(f"Deadlines: (Overdue: {len(deadlines['overdue'])} - Due today: {len(deadlines['today'])}"
+              f" - Upcoming: {len(deadlines['upcoming'])})")
         print("\t0. Exit")
         print("\t1. Add task")
         print("\t2. Show tasks")
         print("\t3. Reset daily tasks")
         print("\t4. Reset overall tasks")
         print("\t5. Reset tags")
+        print("\t6. Search tasks")
+        print("\t7. Deadlines")
         choice = input("Choose operation: ")
 
         if choice == "0": #Done
@@ -213,12 +311,114 @@ def main():
         elif choice == "5": #Done
             database.reset_tags()
             print("\nAll tags cleared.")
+        elif choice == "6":
+            search_tasks()
+        elif choice == "7":
+            show_deadlines()
         else: #Done
             print("\nInvalid option.")
             
+# ==================================================================
+# Batch commands (non-interactive)
+#                           Functions:
+# build_parser() -> Command line parser for the batch commands
+# run_command() -> Run a batch command and print what changed
+#
+#   python app_cli.py toggle 1 2 3 [--done | --undone]
+#   python app_cli.py delete 1 2 3
+#   python app_cli.py retag 1 2 3 [--add a,b] [--remove c]
+#   python app_cli.py move 1 2 3 --to daily
+#   python app_cli.py export [--type daily] [--tag a,b] [--finished | --unfinished] [-o tasks.ndjson]
+#   python app_cli.py import tasks.ndjson   (or - for stdin)
+#   python app_cli.py archive [--days 30]
+# ==================================================================
+
+def build_parser():
+    """Command line parser for the batch commands."""
+    
+    def tag_list(value):
+        return [tag.strip() for tag in value.split(",") if tag.strip()]
+    
+    parser = argparse.ArgumentParser(description="Task manager. Without a command, starts the interactive menu.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    toggle = commands.add_parser("toggle", help="toggle the finished status of tasks")
+    toggle.add_argument("ids", nargs="+", type=int)
+    finished = toggle.add_mutually_exclusive_group()
+    finished.add_argument("--done", dest="finished", action="store_const", const=True,
+                          help="mark the tasks finished instead of toggling")
+    finished.add_argument("--undone", dest="finished", action="store_const", const=False,
+                          help="mark the tasks unfinished instead of toggling")
+    
+    delete = commands.add_parser("delete", help="delete tasks")
+    delete.add_argument("ids", nargs="+", type=int)
+    
+    retag = commands.add_parser("retag", help="add and remove tags on tasks")
+    retag.add_argument("ids", nargs="+", type=int)
+    retag.add_argument("--add", type=tag_list, default=[], help="tags to add (comma separated)")
+    retag.add_argument("--remove", type=tag_list, default=[], help="tags to remove (comma separated)")
+    
+    move = commands.add_parser("move", help="move tasks to another type (moving to daily clears deadlines)")
+    move.add_argument("ids", nargs="+", type=int)
+    move.add_argument("--to", dest="task_type", choices=["daily", "overall"], required=True)
+    
+    export = commands.add_parser("export", help="write tasks as NDJSON, one task per line")
+    export.add_argument("--type", dest="task_type", choices=["daily", "overall"])
+    export.add_argument("--tag", dest="tags", type=tag_list, default=[], help="only tasks with all these tags")
+    status = export.add_mutually_exclusive_group()
+    status.add_argument("--finished", dest="finished", action="store_const", const=True)
+    status.add_argument("--unfinished", dest="finished", action="store_const", const=False)
+    export.add_argument("-o", "--output", type=argparse.FileType("w", encoding="utf-8"), default="-",
+                        help="file to write (default: stdout)")
+    
+    import_ = commands.add_parser("import", help="add the tasks of an NDJSON file")
+    import_.add_argument("input", type=argparse.FileType("r", encoding="utf-8"), help="file to read (- for stdin)")
+    
+    archive = commands.add_parser("archive", help="move overall tasks finished long ago to the archive")
+    archive.add_argument("--days", type=float, help="days since finishing (default: TaskJSON.ARCHIVE_AFTER_DAYS)")
+    return parser
+
+
+def run_command(argv):
+    """Run a batch command and print what changed."""
+    
+    args = build_parser().parse_args(argv)
+    if args.command == "export":
+        with args.output:
+            args.output.writelines(export_ndjson(database, args.task_type, args.tags, args.finished))
+        return
+    if args.command == "archive":
+        if not hasattr(database, "archive_finished"):
+            print("Only the JSON store keeps an archive.")
+            return
+        print(f"{database.archive_finished(args.days)} task(s) archived, "
+              f"{database.get_archived_count()} in the archive.")
+        return
+    if args.command == "import":
+        with args.input:
+            report = import_ndjson(database, args.input)
+        print(f"{report['imported']} task(s) imported, {report['skipped']} skipped (title taken), "
+              f"{report['invalid']} invalid.")
+        for error in report['errors']:
+            print(f"\t{error}")
+        return
+    
+    if args.command == "toggle":
+        changed = database.bulk_toggle(args.ids, args.finished)
+    elif args.command == "delete":
+        changed = database.bulk_delete(args.ids)
+    elif args.command == "retag":
+        changed = database.bulk_retag(args.ids, add=args.add, remove=args.remove)
+    else:  # "move"
+        changed = database.bulk_move(args.ids, args.task_type)
+    print(f"{changed} of {len(set(args.ids))} task(s) changed.")
+
 # ==================================================================
 # Entry Point
 # ==================================================================
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        run_command(sys.argv[1:])
+    else:
+        main()
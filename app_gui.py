@@ -1,16 +1,44 @@
 #                            TASK MANAGER GRAPHICAL USER INTERFACE APPLICATION (v1.0.0)
 
-from flask import Flask, render_template, request, redirect, url_for
+import os
+import time
+from math import ceil
+from flask import (Flask, Response, before_render_template, g, jsonify, render_template, request, redirect,
+                   stream_with_context, template_rendered, url_for)
+from markupsafe import Markup
 from datetime import datetime
-from task_logic.task import Task
-from task_logic.task_json import TaskJSON
+from task_logic.task import Task, classify_deadlines, next_status_change, parse_datetime
+from task_logic.task_archive import ARCHIVE_TYPE
+from task_logic.task_cache import LRUCache
+from task_logic.task_metrics import (HTTP_REQUEST_SECONDS, HTTP_REQUESTS, METRICS_ENABLED, TEMPLATE_RENDER_SECONDS,
+                                     registry, watch_store)
+from task_logic.task_ndjson import export_ndjson, import_ndjson
+from task_logic.task_rollover import DailyRollover
+from task_logic.task_storage import open_storage
 
 
 app = Flask(__name__)
-database = TaskJSON()
+app.jinja_env.globals['ARCHIVE_TYPE'] = ARCHIVE_TYPE  # type of archived (read-only) tasks, for the templates
+database = open_storage()  # backend from TASK_STORAGE (json/sqlite)
+rollover = DailyRollover(database)  # resets the finished daily tasks each new day
 
 # Valid operations that can be triggered from the tasks page.
 VALID_OPERATIONS = ['add_task','reset_tasks','reset_tags']
+# Bulk operations on the selected rows of the tasks page, and of POST /api/tasks/bulk.
+BULK_FORM_OPERATIONS = ['add_tags', 'remove_tags', 'finish', 'unfinish', 'move', 'delete']
+BULK_API_OPERATIONS = ['toggle', 'delete', 'retag', 'move']
+
+# Task list paging, sorting and tag filtering (?page=, ?per_page=, ?sort=, ?order=, ?tag=, ?match=).
+PAGE_SIZE = int(os.environ.get('TASK_PAGE_SIZE', 50))
+MAX_PAGE_SIZE = 500
+SORT_OPTIONS = ['id', 'deadline', 'created_at', 'title', 'finished']
+SEARCH_LIMIT = 100  # results shown by /search and /deadlines
+DEADLINE_VIEWS = ['overdue', 'upcoming', 'next']
+API_FIELDS = ['title', 'description', 'tags', 'deadline']  # what POST/PATCH /api/tasks may set
+
+# Rendered task pages, keyed by (URL, store version), and rendered rows, keyed by what they show.
+page_cache = LRUCache(int(os.environ.get('TASK_PAGE_CACHE', 128)))
+row_cache = LRUCache(int(os.environ.get('TASK_ROW_CACHE', 4096)))
 
 # ==================================================================
 # Route handlers
@@ -20,6 +48,8 @@ VALID_OPERATIONS = ['add_task','reset_tasks','reset_tags']
 # add() -> Add task page: handle adding a new task.
 # edit() -> Edit task page: handle editing an existing task.
 # view() -> View task page: display task details.
+# search() -> Search page: list the tasks matching a text query.
+# deadlines() -> Deadlines page: list overdue, due-soon or next-due tasks.
 # ==================================================================
 
 @app.route("/", methods=["GET", "POST"])
@@ -54,14 +84,47 @@ def tasks_page(task_type):
         if task_id_to_toggle_finished:
             database.toggle_task_finished(int(task_id_to_toggle_finished), task_type)
             return _redirect_url_for(task_type)
+        
+        bulk_operation = request.form.get("bulk")
+        if bulk_operation in BULK_FORM_OPERATIONS:
+            _process_bulk_operation(task_type, bulk_operation)
+            return _redirect_url_for(task_type)
 
 
-    tasks = database.get_tasks_by_type(task_type)
-    return render_template("tasks.html", 
-                           tasks=tasks, 
+    # Read the version first: a change made meanwhile can only make the entry older.
+    cache_key = (request.full_path, database.get_version())
+    now = datetime.now()
+    cached = page_cache.get(cache_key)
+    if cached and (cached[1] is None or now <= cached[1]):
+        return cached[0]
+
+    per_page = min(max(request.args.get('per_page', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    page = max(request.args.get('page', 1, type=int), 1)
+    sort_by = request.args.get('sort', 'id')
+    if sort_by not in SORT_OPTIONS:
+        sort_by = 'id'
+    order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+    selected_tags = [tag for tag in request.args.getlist('tag') if tag]
+    match = 'any' if request.args.get('match') == 'any' else 'all'
+
+    tasks, total = database.get_tasks_page(task_type, sort_by, order == 'desc', 
+                                           (page - 1) * per_page, per_page,
+                                           tags=selected_tags, match_all=(match == 'all'))
+    html = render_template("tasks.html", 
+                           rows=_render_rows(tasks, classify_deadlines(tasks, now)),
                            active_tab=task_type, 
-                           humanize_datetime=humanize_datetime, # function
-                           get_deadline_status=get_deadline_status) #function
+                           page=page,
+                           pages=max(ceil(total / per_page), 1),
+                           per_page=per_page,
+                           sort_by=sort_by,
+                           order=order,
+                           sort_options=SORT_OPTIONS,
+                           tags=database.get_tags(),
+                           selected_tags=selected_tags,
+                           match=match)
+    # valid until a deadline status on the page changes
+    page_cache.put(cache_key, (html, next_status_change(tasks, now)))
+    return html
 
 
 @app.route("/add", methods=["GET", "POST"])
@@ -74,7 +137,6 @@ def add():
         if click_operation == 'cancel':
             return _redirect_url_for(request.form.get("task_type", "index"))
         if click_operation == 'add':
-            _log_form_submission()
             task_type = _process_entry_task('add')
             return _redirect_url_for(task_type)
     
@@ -95,28 +157,27 @@ def edit():
         return "Task not found", 404
 
     task, task_type = result  # safe unpacking now
-    print(result,'\n') 
-    print(task_type,'\n') 
+    if task_type == ARCHIVE_TYPE:
+        return "Archived tasks are read-only", 403
     if request.method == 'POST':
         click_operation = request.form.get('click_operation')  # "cancel" or "save"
         if click_operation == 'cancel':
             return _redirect_url_for(request.form.get("task_type", "index"))
         if click_operation == 'edit':
-            _log_form_submission()
             task_type = _process_entry_task('edit')
-            print(task_type,'\n')
+            if task_type is None:
+                return "A task with this title already exists", 409
             return _redirect_url_for(task_type)
 
-    task['deadline'] = fix_deadline_format(task['deadline'])
     # GET request → render form
     return render_template('entry.html', 
-                           id=task['id'], 
-                           title=task['title'],
-                           description=task['description'],
+                           id=task.id, 
+                           title=task.title,
+                           description=task.description,
                            tags=database.get_tags(),
-                           selected_tags=task['tags'],
+                           selected_tags=task.tags,
                            new_tags="",
-                           deadline=task['deadline'],
+                           deadline=fix_deadline_format(task.deadline),
                            task_type=task_type,
                            active_tab='edit')
 
@@ -132,39 +193,329 @@ def view():
 
     task, task_type = result  # safe unpacking now
     return render_template('view.html', 
-                           id=task['id'], 
-                           title=task['title'],
-                           description=task['description'],
-                           selected_tags=task['tags'],
-                           deadline=task['deadline'],
+                           id=task.id, 
+                           title=task.title,
+                           description=task.description,
+                           selected_tags=task.tags,
+                           deadline=fix_deadline_format(task.deadline),
                            task_type=task_type,
                            active_tab='view')
 
+@app.route("/search", methods=["GET"])
+def search():
+    """Search page: list the tasks matching a text query."""
+    
+    query = request.args.get('q', '').strip()
+    task_type = request.args.get('type')
+    if task_type not in ['daily', 'overall', ARCHIVE_TYPE]:
+        task_type = None
+    tasks = database.search_tasks(query, task_type, limit=SEARCH_LIMIT) if query else []
+    return render_template('results.html',
+                           tasks=tasks,
+                           rows=zip(tasks, classify_deadlines(tasks)), # (task, deadline status)
+                           heading=f'RESULTS FOR "{query}"' + (' IN THE ARCHIVE' if task_type == ARCHIVE_TYPE else ''),
+                           query=query,
+                           # the archive is searched only on request
+                           archive_url=url_for('search', q=query, type=ARCHIVE_TYPE)
+                                       if query and task_type != ARCHIVE_TYPE else None,
+                           active_tab='search',
+                           humanize_datetime=humanize_datetime) # function
+
+@app.route("/deadlines/<view>", methods=["GET"])
+def deadlines(view):
+    """Deadlines page: list overdue, due-soon or next-due tasks."""
+    
+    if view == 'overdue':
+        tasks = database.get_overdue_tasks(limit=SEARCH_LIMIT)
+        heading = 'OVERDUE'
+    elif view == 'upcoming':
+        hours = min(max(request.args.get('hours', 24, type=float), 0), 24 * 365)
+        tasks = database.get_tasks_due_within(hours, limit=SEARCH_LIMIT)
+        heading = f'DUE IN THE NEXT {hours:g} HOURS'
+    elif view == 'next':
+        count = min(max(request.args.get('n', 10, type=int), 1), SEARCH_LIMIT)
+        tasks = database.get_next_deadlines(count)
+        heading = f'NEXT {count} DEADLINES'
+    else:
+        return "Page not found", 404
+    
+    return render_template('results.html',
+                           tasks=tasks,
+                           rows=zip(tasks, classify_deadlines(tasks)), # (task, deadline status)
+                           heading=heading,
+                           deadline_views=DEADLINE_VIEWS,
+                           active_tab='deadlines',
+                           humanize_datetime=humanize_datetime) # function
+
+# ==================================================================
+# API routes (JSON)
+#                           Functions:
+# api_list_tasks() -> GET /api/tasks: a sorted page of tasks, with the same filters as the tasks page.
+# api_get_task() -> GET /api/tasks/<id>: one task.
+# api_create_task() -> POST /api/tasks: add a task.
+# api_update_task() -> PATCH /api/tasks/<id>: change some fields of a task.
+# api_delete_task() -> DELETE /api/tasks/<id>: delete a task.
+# api_toggle_task() -> POST /api/tasks/<id>/toggle: toggle the finished status of a task.
+# api_bulk() -> POST /api/tasks/bulk: toggle, delete, retag or move many tasks at once.
+# api_export() -> GET /api/tasks/export: stream the matching tasks as NDJSON.
+# api_import() -> POST /api/tasks/import: add the tasks of an NDJSON body.
+#
+# GET responses carry the store version as their ETag; a client sending it
+# back in If-None-Match gets 304 Not Modified until something changes.
+# ==================================================================
+
+@app.route("/api/tasks", methods=["GET"])
+def api_list_tasks():
+    """GET /api/tasks: a sorted page of tasks, with the same filters as the tasks page."""
+    
+    def build():
+        task_type = request.args.get('type', 'overall')
+        sort_by = request.args.get('sort', 'id')
+        limit = request.args.get('limit', type=int)
+        tasks, total = database.get_tasks_page(task_type,
+                                               sort_by if sort_by in SORT_OPTIONS else 'id',
+                                               request.args.get('order') == 'desc',
+                                               max(request.args.get('offset', 0, type=int), 0),
+                                               min(max(limit, 0), MAX_PAGE_SIZE) if limit is not None else None,
+                                               tags=[tag for tag in request.args.getlist('tag') if tag],
+                                               match_all=request.args.get('match') != 'any')
+        return {'tasks': [task.to_dict() for task in tasks], 'total': total}
+    
+    return _conditional_json(build)
+
+
+@app.route("/api/tasks/<int:task_id>", methods=["GET"])
+def api_get_task(task_id):
+    """GET /api/tasks/<id>: one task."""
+    
+    def build():
+        result = database.get_task_by_id(task_id)
+        return result[0].to_dict() if result else None
+    
+    return _conditional_json(build)
+
+
+@app.route("/api/tasks", methods=["POST"])
+def api_create_task():
+    """POST /api/tasks: add a task."""
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or data.get('type') not in ['daily', 'overall']:
+        return _api_error("A JSON object with type 'daily' or 'overall' is required", 400)
+    if not data.get('title'):
+        return _api_error("A title is required", 400)
+    
+    task = Task(type=data['type'], id=0, title=data['title'], description=data.get('description', ''))
+    error = _apply_api_fields(task, data)
+    if error:
+        return _api_error(error, 400)
+    database.add_task(task, data['type'])
+    if not task.id:  # add_task() skips tasks whose title is taken
+        return _api_error("A task with this title already exists", 409)
+    return _json_with_etag(task.to_dict(), 201)
+
+
+@app.route("/api/tasks/<int:task_id>", methods=["PATCH"])
+def api_update_task(task_id):
+    """PATCH /api/tasks/<id>: change some fields of a task."""
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return _api_error("A JSON object is required", 400)
+    result = database.get_task_by_id(task_id)
+    if not result:
+        return _api_error("Task not found", 404)
+    if result[1] == ARCHIVE_TYPE:
+        return _api_error("Archived tasks are read-only", 409)
+    
+    task = Task.from_dict(result[0].to_dict())  # a copy, the store applies the edit
+    error = _apply_api_fields(task, data)
+    if error:
+        return _api_error(error, 400)
+    # the store checks the title under its lock, so a concurrent edit cannot take it in between
+    if not database.edit_task(task, result[1]):
+        if not database.get_task_by_id(task_id):  # deleted meanwhile
+            return _api_error("Task not found", 404)
+        return _api_error("A task with this title already exists", 409)
+    return _json_with_etag(task.to_dict())
+
+
+@app.route("/api/tasks/<int:task_id>", methods=["DELETE"])
+def api_delete_task(task_id):
+    """DELETE /api/tasks/<id>: delete a task."""
+    
+    result = database.get_task_by_id(task_id)
+    if not result:
+        return _api_error("Task not found", 404)
+    if result[1] == ARCHIVE_TYPE:
+        return _api_error("Archived tasks are read-only", 409)
+    database.delete_task(task_id, result[1])
+    return "", 204
+
+
+@app.route("/api/tasks/<int:task_id>/toggle", methods=["POST"])
+def api_toggle_task(task_id):
+    """POST /api/tasks/<id>/toggle: toggle the finished status of a task."""
+    
+    result = database.get_task_by_id(task_id)
+    if not result:
+        return _api_error("Task not found", 404)
+    if result[1] == ARCHIVE_TYPE:
+        return _api_error("Archived tasks are read-only", 409)
+    database.toggle_task_finished(task_id, result[1])
+    result = database.get_task_by_id(task_id)
+    if not result:  # deleted meanwhile
+        return _api_error("Task not found", 404)
+    return _json_with_etag(result[0].to_dict())
+
+@app.route("/api/tasks/bulk", methods=["POST"])
+def api_bulk():
+    """POST /api/tasks/bulk: toggle, delete, retag or move many tasks at once.
+
+    Body: {"op": "toggle"|"delete"|"retag"|"move", "ids": [...]}, plus "finished"
+    (optional, for toggle), "add"/"remove" tag lists (retag) or "type" (move).
+    """
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or data.get('op') not in BULK_API_OPERATIONS:
+        return _api_error(f"op must be one of {', '.join(BULK_API_OPERATIONS)}", 400)
+    task_ids = data.get('ids')
+    if not isinstance(task_ids, list) or not all(type(task_id) is int for task_id in task_ids):
+        return _api_error("ids must be a list of task ids", 400)
+    
+    op = data['op']
+    if op == 'toggle':
+        finished = data.get('finished')
+        if finished is not None and not isinstance(finished, bool):
+            return _api_error("finished must be true, false or left out", 400)
+        changed = database.bulk_toggle(task_ids, finished)
+    elif op == 'delete':
+        changed = database.bulk_delete(task_ids)
+    elif op == 'retag':
+        add, remove = data.get('add', []), data.get('remove', [])
+        if not all(isinstance(tags, list) and all(isinstance(tag, str) for tag in tags) for tags in (add, remove)):
+            return _api_error("add and remove must be lists of strings", 400)
+        changed = database.bulk_retag(task_ids, add, remove)
+    else:  # 'move'
+        if data.get('type') not in ['daily', 'overall']:
+            return _api_error("type must be 'daily' or 'overall'", 400)
+        changed = database.bulk_move(task_ids, data['type'])
+    return _json_with_etag({'changed': changed})
+
+
+@app.route("/api/tasks/export", methods=["GET"])
+def api_export():
+    """GET /api/tasks/export: stream the matching tasks as NDJSON (?type=, ?tag=, ?finished=true|false)."""
+    
+    task_type = request.args.get('type')
+    finished = request.args.get('finished')
+    lines = export_ndjson(database,
+                          task_type if task_type in ['daily', 'overall'] else None,
+                          [tag for tag in request.args.getlist('tag') if tag],
+                          {'true': True, 'false': False}.get(finished))
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename=tasks.ndjson'})
+
+
+@app.route("/api/tasks/import", methods=["POST"])
+def api_import():
+    """POST /api/tasks/import: add the tasks of an NDJSON body, read line by line."""
+    
+    return jsonify(import_ndjson(database, request.stream))
+
+# ==================================================================
+# Metrics (TASK_METRICS=1)
+#                           Functions:
+# metrics() -> GET /metrics: the collected metrics in the Prometheus text format.
+# _start_request_timer() -> Notes when a request started.
+# _record_request() -> Counts a request and observes how long it took, by route.
+# _start_render_timer() -> Notes when a template started rendering.
+# _record_render() -> Observes how long a template took to render.
+#
+# Without TASK_METRICS none of the hooks is installed and /metrics is a 404.
+# ==================================================================
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """GET /metrics: the collected metrics in the Prometheus text format."""
+    
+    if not METRICS_ENABLED:
+        return "Metrics are disabled (set TASK_METRICS=1)", 404
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _start_request_timer():
+    """Notes when a request started."""
+    
+    g.request_start = time.perf_counter()
+
+
+def _record_request(response):
+    """Counts a request and observes how long it took, by route (not URL, to keep the series few)."""
+    
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, route, request.method)
+    return response
+
+
+def _start_render_timer(sender, template, context, **extra):
+    """Notes when a template started rendering."""
+    
+    g.render_start = time.perf_counter()
+
+
+def _record_render(sender, template, context, **extra):
+    """Observes how long a template took to render."""
+    
+    TEMPLATE_RENDER_SECONDS.observe(time.perf_counter() - g.render_start, template.name)
+
+
+if METRICS_ENABLED:
+    watch_store(database)
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+    before_render_template.connect(_start_render_timer, app)
+    template_rendered.connect(_record_render, app)
+
+
+# ==================================================================
+# Daily rollover
+#                           Functions:
+# _roll_over_daily() -> Resets yesterday's finished daily tasks on the first request of a new day.
+#
+# The first request starts the rollover timer, so importing the app (tests,
+# benchmarks, tools) neither resets tasks nor starts a thread. The timer does
+# the same at midnight; whichever comes first does the work, and for the
+# rest of the day this is one date comparison.
+# ==================================================================
+
+@app.before_request
+def _roll_over_daily():
+    """Resets yesterday's finished daily tasks on the first request of a new day."""
+    
+    rollover.start()  # only the first request starts it
+    rollover.check()
+
+
 # ==================================================================
 # Helper functions
 #                           Functions:
-# _log_form_submission() -> Debugging
 # _process_entry_task() -> Process task entry form data
+# _process_bulk_operation() -> Apply a bulk operation to the selected rows
 # _redirect_url_for() -> Redirect to URL
-# fix_deadline_format() -> Convert ISO 8601 to 'YYYY-MM-DDTHH:MM'
+# fix_deadline_format() -> Convert datetime/ISO 8601 to 'YYYY-MM-DDTHH:MM'
 # humanize_datetime() -> Convert datetime to human-readable format
-# get_deadline_status() -> Get deadline status
+# _render_rows() -> Rendered task rows, from the row cache when possible
+# _conditional_json() -> JSON response, or 304 if the client has the current version
+# _json_with_etag() -> JSON response tagged with the store version
+# _api_error() -> JSON error response
+# _apply_api_fields() -> Copy API fields onto a task
 
 # ==================================================================
 
-def _log_form_submission():
-    """Debugging."""
-    print(f'task_type: {request.form.get("task_type")}\n')
-    print(f'id: {request.form.get("id")}\n')
-    print(f'title: {request.form.get("title")}\n')
-    print(f'description: {request.form.get("description")}\n')
-    print(f'tags: {request.form.getlist("tags")}\n')
-    print(f'new_tags: {request.form.get("new_tags")}\n')
-    print(f'deadline: {request.form.get("deadline")}\n')
-
-
 def _process_entry_task(entry_type: str):
-    """Process task entry form data and return task type."""
+    """Process task entry form data and return task type (None if the edit was rejected)."""
     
     def _build_task_from_form():
         """Build task from form data."""
@@ -194,14 +545,35 @@ def _process_entry_task(entry_type: str):
     task_type, entry_task = _build_task_from_form()
     
     if entry_type == 'edit':
-        database.edit_task(entry_task.to_dict(), task_type)
+        if not database.edit_task(entry_task, task_type):
+            return None
     elif entry_type == 'add':
-        database.add_task(entry_task.to_dict(), task_type)
+        database.add_task(entry_task, task_type)
     
-    # always return task_type so we redirect correctly
+    # return task_type so we redirect correctly
     return task_type
 
 
+def _process_bulk_operation(task_type, operation):
+    """Apply a bulk operation from the tasks page to the selected rows."""
+    
+    task_ids = [int(task_id) for task_id in request.form.getlist("selected") if task_id.isdigit()]
+    tags = [tag.strip() for tag in request.form.get("bulk_tags", "").split(',') if tag.strip()]
+    if not task_ids:
+        return
+    
+    if operation == 'add_tags':
+        database.bulk_retag(task_ids, add=tags)
+    elif operation == 'remove_tags':
+        database.bulk_retag(task_ids, remove=tags)
+    elif operation in ('finish', 'unfinish'):
+        database.bulk_toggle(task_ids, finished=(operation == 'finish'))
+    elif operation == 'move':
+        database.bulk_move(task_ids, 'overall' if task_type == 'daily' else 'daily')
+    elif operation == 'delete':
+        database.bulk_delete(task_ids)
+
+
 def _redirect_url_for(page_name):
     """Redirect to a specific page."""
         
@@ -226,10 +598,12 @@ def _process_task_operation(task_type, operation):
 
 
 def fix_deadline_format(deadline):
-    """Convert ISO 8601 to 'YYYY-MM-DDTHH:MM' for HTML datetime-local input."""
+    """Convert a datetime or ISO 8601 string to 'YYYY-MM-DDTHH:MM' for HTML datetime-local input."""
     
     if not deadline:
         return None
+    if isinstance(deadline, datetime):
+        return deadline.strftime("%Y-%m-%dT%H:%M")
     try:
         dt = datetime.fromisoformat(deadline)
         return dt.strftime("%Y-%m-%dT%H:%M")
@@ -248,22 +622,78 @@ def humanize_datetime(value, format="%a %b %d, %Y %I:%M %p"):
     return value.strftime(format).replace("AM", "am").replace("PM", "pm")
 
 
-def get_deadline_status(task_dict):
-    """Get deadline status."""
+def _render_rows(tasks, statuses):
+    """Rendered task_row.html of each task, from the row cache when possible."""
     
-    task = Task.from_dict(task_dict)
+    template = app.jinja_env.get_template('task_row.html')
+    rows = []
+    for task, status in zip(tasks, statuses):
+        key = (task.id, task.title, tuple(task.tags), task.deadline, task.created_at, task.finished, status)
+        row = row_cache.get(key)
+        if row is None:
+            with TEMPLATE_RENDER_SECONDS.time('task_row.html'):
+                row = Markup(template.render(task=task, status=status, humanize_datetime=humanize_datetime))
+            row_cache.put(key, row)
+        rows.append(row)
+    return rows
+
+
+def _conditional_json(build):
+    """JSON response from build(), or 304 if the client already has the current version.
+
+    The version is read before build() runs, so a change made meanwhile can only
+    make the ETag older than the body, and the client refetches next time.
+    """
     
-    delta = task.get_time_left()
+    version = database.get_version()
+    if str(version) in request.if_none_match:
+        return "", 304, {'ETag': f'"{version}"'}
+    body = build()
+    if body is None:
+        return _api_error("Task not found", 404)
+    response = jsonify(body)
+    response.set_etag(str(version))
+    return response
+
+
+def _json_with_etag(body, status=200):
+    """JSON response tagged with the store version."""
+    
+    response = jsonify(body)
+    response.status_code = status
+    response.set_etag(str(database.get_version()))
+    return response
+
+
+def _api_error(message, status):
+    """JSON error response."""
+    
+    return jsonify({'error': message}), status
+
+
+def _apply_api_fields(task, data):
+    """Copy the API fields in data onto a task; returns an error message for invalid ones."""
     
-    if task.finished:
-        return "deadline-finished"
-    if delta is None:
-        return "deadline-none"
-    if delta.total_seconds() < 0:
-        return "deadline-overdue"
-    if delta.days == 0:
-        return "deadline-today"
-    return "deadline-upcoming"
+    for field in API_FIELDS:
+        if field not in data:
+            continue
+        value = data[field]
+        if field == 'tags':
+            if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+                return "tags must be a list of strings"
+            task.tags = list(dict.fromkeys(tag.strip() for tag in value if tag.strip()))
+        elif field == 'deadline':
+            try:
+                if value is not None and not isinstance(value, str):
+                    raise ValueError
+                task.deadline = parse_datetime(value)
+            except ValueError:
+                return "deadline must be an ISO 8601 date and time"
+        elif not isinstance(value, str) or (field == 'title' and not value.strip()):
+            return f"{field} must be a non-empty string" if field == 'title' else f"{field} must be a string"
+        else:
+            setattr(task, field, value)
+    return None
 
 
 # ==================================================================
@@ -271,5 +701,4 @@ def get_deadline_status(task_dict):
 # ==================================================================
 
 if __name__ == "__main__":
-    database.reset_daily_finished()  # reset daily finished tasks if needed
     app.run(debug=True)
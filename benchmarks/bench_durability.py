@@ -0,0 +1,50 @@
+#                            DURABILITY BENCHMARK (v1.0.0)
+#
+# Measures what each durability level costs per change, for both backends:
+# throughput plus median and p99 latency of single-task add_task() calls.
+#
+#   python benchmarks/bench_durability.py [--changes 500] [--backend json|sqlite]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_logic.task import Task
+from task_logic.task_storage import DURABILITY_LEVELS, open_storage
+
+def run(backend: str, durability: str, changes: int):
+    """Returns the latency of each of changes add_task() calls, in milliseconds."""
+
+    latencies = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_storage(backend, directory, durability=durability)
+        for i in range(changes):
+            task = Task('overall', 0, f'task {i}', 'durability benchmark', ['bench'])
+            start = time.perf_counter()
+            store.add_task(task, 'overall')
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the cost of each durability level.")
+    parser.add_argument('--changes', type=int, default=500)
+    parser.add_argument('--backend', choices=['json', 'sqlite'], action='append')
+    args = parser.parse_args()
+
+    print(f"{'backend':<8}{'durability':<12}{'changes/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for backend in args.backend or ['json', 'sqlite']:
+        for durability in DURABILITY_LEVELS:
+            latencies = run(backend, durability, args.changes)
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            print(f"{backend:<8}{durability:<12}{len(latencies) / (sum(latencies) / 1000):>10.0f}"
+                  f"{statistics.median(latencies):>9.3f}{p99:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
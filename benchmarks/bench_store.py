@@ -0,0 +1,259 @@
+#                            STORE BENCHMARK (v1.0.0)
+#
+# Times the TaskJSON operations and the /daily page on synthetic stores of
+# growing size: throughput, p50/p99 latency and peak traced memory of each.
+# Stores are generated from a fixed seed, so runs on different commits see
+# the same data; --json writes the results and --compare prints how a run
+# differs from one written earlier.
+#
+#   python benchmarks/bench_store.py [--sizes 1000,10000,100000,1000000] [--ops 200]
+#                                    [--mode json|binary|lazy]
+#                                    [--json results.json] [--compare baseline.json]
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_logic.task import Task, format_datetime
+from task_logic import task_storage
+from task_logic.task_storage import open_storage
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+# How the store keeps its snapshot: (snapshot format, lazy descriptions)
+MODES = {'json': ('json', False), 'binary': ('binary', False), 'lazy': ('binary', True)}
+SEED = 42
+TAG_POOL = [f'tag{i}' for i in range(50)]
+MEMORY_SAMPLES = 20  # calls per operation traced for peak memory (tracing slows them down)
+
+# ==================================================================
+# Benchmark
+#                           Functions:
+# generate_snapshot() -> Writes a synthetic snapshot of size tasks.
+# open_store() -> Returns a TaskJSON store kept in directory.
+# measure() -> Times each call of an operation, and traces the peak memory of a few more.
+# bench_size() -> Returns the results of every operation on a store of the given size.
+# summarize() -> Returns throughput and latency figures of a list of latencies.
+# git_commit() -> Returns the commit the benchmark runs on, or None outside a git checkout.
+# ==================================================================
+
+def generate_snapshot(path: str, size: int, seed: int = SEED):
+    """Writes a synthetic snapshot of size tasks.
+
+    A third of the daily tasks were finished yesterday, so reset_daily_finished()
+    has work to do; overall tasks have deadlines spread around now.
+    """
+
+    rng = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    yesterday = now - timedelta(days=1)
+    tasks = {'latest_id': size, 'version': 0, 'tags': TAG_POOL, 'daily': [], 'overall': []}
+    for task_id in range(1, size + 1):
+        task_type = 'daily' if rng.random() < 0.4 else 'overall'
+        finished = rng.random() < 0.3
+        deadline = None
+        if task_type == 'overall' and rng.random() < 0.7:
+            deadline = format_datetime(now + timedelta(hours=rng.randint(-24 * 30, 24 * 90)))
+        tasks[task_type].append({
+            'type': task_type,
+            'id': task_id,
+            'title': f'{task_type} task {task_id}',
+            'description': ' '.join(rng.choices(['plan', 'review', 'write', 'call', 'fix', 'ship',
+                                                 'report', 'budget', 'meeting', 'notes'], k=8)),
+            'tags': rng.sample(TAG_POOL, rng.randint(0, 3)),
+            'deadline': deadline,
+            'created_at': format_datetime(now - timedelta(minutes=size - task_id)),
+            'finished': finished,
+            'finished_at': format_datetime(yesterday) if finished else None,
+        })
+    with open(path, 'w') as jf:
+        json.dump(tasks, jf)
+
+
+def open_store(directory: str, mode: str = 'json'):
+    """Returns a TaskJSON store kept in directory (the first one opened takes data.json over)."""
+
+    snapshot_format, lazy = MODES[mode]
+    return open_storage('json', directory, snapshot_format=snapshot_format, lazy=lazy)
+
+
+def measure(operation, calls: int, setup=None, trace: bool = True):
+    """Times each call of an operation, and traces the peak memory of a few more.
+
+    operation gets the call number, or what setup (run outside the timing)
+    returns for it. Returns (latencies in ms, peak bytes, or None if not traced).
+    """
+
+    latencies = []
+    for i in range(calls):
+        argument = setup(i) if setup else i
+        start = time.perf_counter()
+        operation(argument)
+        latencies.append((time.perf_counter() - start) * 1000)
+    if not trace:
+        return latencies, None
+
+    peak = 0
+    tracemalloc.start()
+    for i in range(calls, calls + min(calls, MEMORY_SAMPLES)):
+        argument = setup(i) if setup else i
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        operation(argument)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return latencies, peak
+
+
+def bench_size(size: int, calls: int, client, mode: str = 'json'):
+    """Returns the results of every operation on a store of the given size."""
+
+    import app_gui
+
+    results = {}
+    rng = random.Random(SEED + size)
+    with tempfile.TemporaryDirectory() as directory:
+        generate_snapshot(os.path.join(directory, 'data.json'), size)
+        open_store(directory, mode)  # converts data.json once, outside the timing
+
+        # load: a few timed loads, then one traced one
+        load_calls = max(1, min(5, 100000 // size))
+        latencies = []
+        for _ in range(load_calls):
+            start = time.perf_counter()
+            store = open_store(directory, mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            del store
+        tracemalloc.start()
+        store = open_store(directory, mode)
+        results['load'] = (latencies, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        # reset_daily_finished: the first call resets yesterday's tasks (only once, so it
+        # is not traced), later ones find nothing before today in the finish day index
+        results['reset_daily_finished'] = measure(lambda _: store.reset_daily_finished(), 1, trace=False)
+        results['reset_daily_finished (no-op)'] = measure(lambda _: store.reset_daily_finished(), calls)
+
+        ids = list(range(1, size + 1))
+        rng.shuffle(ids)
+        results['get_task_by_id'] = measure(lambda i: store.get_task_by_id(ids[i % size]), calls)
+        results['add_task'] = measure(
+            lambda i: store.add_task(Task('overall', 0, f'bench task {i}', 'added by the benchmark',
+                                          ['bench']), 'overall'), calls)
+
+        def edited(i):
+            task, task_type = store.get_task_by_id(ids[i % size])
+            copy = Task.from_dict(task.to_dict())
+            copy.description = f'edited by the benchmark ({i})'
+            return copy, task_type
+        results['edit_task'] = measure(lambda edit: store.edit_task(*edit), calls, setup=edited)
+
+        def located(i):
+            return ids[i % size], store.get_task_by_id(ids[i % size])[1]
+        results['toggle_task_finished'] = measure(lambda found: store.toggle_task_finished(*found),
+                                                  calls, setup=located)
+
+        # /daily through the Flask app, rendered from scratch and then from the page cache
+        app_gui.database = store
+        def uncached(_):
+            app_gui.page_cache.clear()
+            app_gui.row_cache.clear()
+        results['GET /daily'] = measure(lambda _: client.get('/daily'), calls, setup=uncached)
+        results['GET /daily (cached)'] = measure(lambda _: client.get('/daily'), calls)
+
+        # last, so the other operations never look up a deleted id
+        deleted = iter(ids)
+        def to_delete(_):
+            task_id = next(deleted)
+            return task_id, store.get_task_by_id(task_id)[1]
+        results['delete_task'] = measure(lambda found: store.delete_task(*found),
+                                         min(calls, size // 2), setup=to_delete)
+        del store
+    return results
+
+
+def summarize(latencies: list):
+    """Returns throughput and latency figures of a list of latencies."""
+
+    p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+    return {
+        'calls': len(latencies),
+        'ops_per_s': len(latencies) / (sum(latencies) / 1000) if sum(latencies) else None,
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': p99,
+    }
+
+
+def git_commit():
+    """Returns the commit the benchmark runs on, or None outside a git checkout."""
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the store operations and the /daily page at scale.")
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=DEFAULT_SIZES, help="comma separated task counts (default: 1000,10000,100000)")
+    parser.add_argument('--ops', type=int, default=200, help="timed calls per operation")
+    parser.add_argument('--mode', choices=list(MODES), default='json',
+                        help="partitions kept as json, binary, or binary with lazy descriptions")
+    parser.add_argument('--json', metavar='FILE', help="write the results as JSON")
+    parser.add_argument('--compare', metavar='FILE', help="JSON results of an earlier run to compare p50s with")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {(row['size'], row['operation']): row for row in json.load(f)['results']}
+
+    # app_gui opens a store when imported: keep it away from ./task_data
+    with tempfile.TemporaryDirectory() as directory:
+        task_storage.DATA_DIR = directory
+        import app_gui
+        client = app_gui.app.test_client()
+
+        rows = []
+        print(f"{'size':>8}  {'operation':<30}{'calls':>6}{'ops/s':>11}{'p50 ms':>10}{'p99 ms':>10}"
+              f"{'peak KiB':>10}" + (f"{'p50 vs base':>13}" if baseline else ''))
+        for size in args.sizes:
+            for operation, (latencies, peak) in bench_size(size, args.ops, client, args.mode).items():
+                row = {'size': size, 'operation': operation, **summarize(latencies),
+                       'peak_kib': peak / 1024 if peak is not None else None}
+                rows.append(row)
+                line = (f"{size:>8}  {operation:<30}{row['calls']:>6}{row['ops_per_s'] or 0:>11.0f}"
+                        f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+                        f"{'-' if peak is None else format(row['peak_kib'], '.0f'):>10}")
+                before = baseline.get((size, operation))
+                if before and before['p50_ms']:
+                    line += f"{row['p50_ms'] / before['p50_ms']:>12.2f}x"
+                print(line, flush=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'seed': SEED,
+                'ops': args.ops,
+                'mode': args.mode,
+                'results': rows,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#                            THREAD STRESS CHECK (v1.0.0)
+#
+# Hammers a store with add/toggle/delete from many threads, then checks that
+# no id was handed out twice and no update was lost, in memory and on disk.
+#
+#   python benchmarks/stress_threads.py [--backend json|sqlite] [--threads 16] [--tasks 200]
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from task_logic.task import Task
+from task_logic.task_storage import open_storage
+
+def worker(store, number: int, tasks: int, results: dict):
+    """Adds tasks, finishes every one, deletes every third, and reads pages in between."""
+
+    ids = []
+    for i in range(tasks):
+        task = Task('overall', 0, f'thread {number} task {i}', 'stress', [f'tag{i % 5}'])
+        store.add_task(task, 'overall')
+        ids.append(task.id)
+        store.get_tasks_page('overall', 'title', limit=20)
+    for task_id in ids:
+        store.toggle_task_finished(task_id, 'overall')
+        store.toggle_task_finished(task_id, 'overall')
+        store.toggle_task_finished(task_id, 'overall')
+    deleted = ids[::3]
+    for task_id in deleted:
+        store.delete_task(task_id, 'overall')
+    results[number] = (ids, deleted)
+
+
+def check(store, results: dict):
+    """Returns the problems found in the store after the run."""
+
+    problems = []
+    added = [task_id for ids, _ in results.values() for task_id in ids]
+    deleted = {task_id for _, ids in results.values() for task_id in ids}
+    if len(set(added)) != len(added):
+        problems.append(f"{len(added) - len(set(added))} duplicated ids")
+    tasks = store.get_tasks_by_type('overall')
+    expected = set(added) - deleted
+    if {task.id for task in tasks} != expected:
+        problems.append(f"{len(tasks)} tasks left, expected {len(expected)}")
+    unfinished = [task.id for task in tasks if not task.finished]
+    if unfinished:
+        problems.append(f"{len(unfinished)} toggles lost")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammers a task store from many threads.")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--tasks', type=int, default=200, help="tasks added per thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = open_storage(args.backend, directory)
+        results = {}
+        threads = [threading.Thread(target=worker, args=(store, n, args.tasks, results))
+                   for n in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        problems = check(store, results)
+        problems += [f"after reopening: {problem}"
+                     for problem in check(open_storage(args.backend, directory), results)]
+    for problem in problems:
+        print("FAIL:", problem)
+    if problems:
+        sys.exit(1)
+    print(f"OK: {args.threads} threads x {args.tasks} tasks ({args.backend})")
+
+
+if __name__ == '__main__':
+    main()
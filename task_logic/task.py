@@ -1,34 +1,71 @@
 #                            TASK CLASS (v1.0.0)
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M"  # how datetimes are written in the API, exports and schema v1 files
+DEADLINE_STATUSES = ('finished', 'none', 'overdue', 'today', 'upcoming')
+TASK_TYPES = ('daily', 'overall')  # the JSON store keeps each type in a partition of its own
+# Stored epoch seconds count from a naive EPOCH, so they encode the local wall-clock time itself:
+# the same in every time zone, and never shifted by a DST change.
+EPOCH = datetime(1970, 1, 1)
+SECOND = timedelta(seconds=1)
+
+def parse_datetime(value: datetime | str | int | None):
+    """Returns a naive local datetime from an ISO 8601 string, stored epoch seconds or a datetime.
+
+    Strings or datetimes with a UTC offset are converted to local time, as
+    the stores compare and keep every datetime naive.
+    """
+    
+    if value is None or value == '':
+        return None
+    if isinstance(value, int):
+        return EPOCH + SECOND * value  # faster than building a timedelta per value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def format_datetime(value: datetime | None):
+    """Returns the stored 'YYYY-MM-DDTHH:MM' string of a datetime."""
+    
+    return value.strftime(DATETIME_FORMAT) if value else None
+
+
+def to_epoch(value: datetime | None):
+    """Returns the stored epoch seconds of a naive local datetime (seconds since EPOCH)."""
+    
+    return (value - EPOCH) // SECOND if value else None
+
+
 class Task:
+    # Tasks are the in-memory records of the stores, so keep them compact.
+    __slots__ = ('type', 'id', 'title', 'description', 'tags', 'deadline',
+                 'created_at', 'finished', 'finished_at')
+    
     def __init__(self,
                 type: str,
                 id: int,
                 title: str,
                 description: str,
                 tags: list | None = None,
-                deadline: datetime | None = None
+                deadline: datetime | str | int | None = None,
+                created_at: datetime | str | int | None = None,
+                finished: bool = False,
+                finished_at: datetime | str | int | None = None
                 ):
         self.type = type
         self.id = id
         self.title = title
         self.description = description if description is not None else ""
-        self.tags = list({tag for tag in (tags or []) if tag}) # remove empty tags and duplicates
-        
-        if not deadline:
-            self.deadline = None 
-        else:
-            if isinstance(deadline, str):
-                self.deadline = datetime.strptime(deadline, "%Y-%m-%dT%H:%M")
-            else:
-                self.deadline = deadline  # already datetime
-        
-        self.created_at = datetime.now()
-        self.finished = False
-        self.finished_at = None
+        self.tags = list(dict.fromkeys(tag for tag in (tags or []) if tag)) # remove empty tags and duplicates
+        self.deadline = parse_datetime(deadline)
+        self.created_at = parse_datetime(created_at) or datetime.now()
+        self.finished = finished
+        self.finished_at = parse_datetime(finished_at) if finished else None
     
     # ==================================================================
     # Operations
@@ -65,10 +102,7 @@ class Task:
     def set_deadline(self, deadline: datetime | str):
         """Sets the deadline."""
         
-        if isinstance(deadline, str):
-            self.deadline = datetime.strptime(deadline, "%Y-%m-%dT%H:%M")
-        else:
-            self.deadline = deadline  # already datetime
+        self.deadline = parse_datetime(deadline)
     
     def remove_deadline(self):
         """Removes the deadline."""
@@ -99,7 +133,10 @@ class Task:
     # Serialization
     #                           Functions:
     # to_dict() -> Returns the task as a dictionary from a task object.
-    # from_dict() -> Returns the task as a task object from a dictionary.
+    # to_record() -> Returns the task as the JSON store keeps it (schema v3).
+    # from_dict() -> Returns the task as a task object from a dictionary or a stored record.
+    # update_from() -> Copies the fields of another task into this one.
+    # copy() -> Returns a plain Task with the same fields, and its own tag list.
     # ==================================================================
         
     def to_dict(self):
@@ -111,30 +148,115 @@ class Task:
             "title": self.title,
             "description": self.description,
             "tags": self.tags,
-            "deadline": self.deadline.strftime("%Y-%m-%dT%H:%M") if self.deadline else None,
-            "created_at": self.created_at.strftime("%Y-%m-%dT%H:%M"),
+            "deadline": format_datetime(self.deadline),
+            "created_at": format_datetime(self.created_at),
+            "finished": self.finished,
+            "finished_at": format_datetime(self.finished_at) if self.finished else None
+        }
+    
+    def to_record(self, tag_ids: dict | None = None):
+        """Returns the task as the JSON store keeps it (schema v3).
+
+        Datetimes are epoch seconds, and tags are ids into the store's tag
+        table when tag_ids (tag -> id) is given, names otherwise.
+        """
+        
+        return {
+            "type": self.type,
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "tags": [tag_ids[tag] for tag in self.tags] if tag_ids is not None else self.tags,
+            "deadline": to_epoch(self.deadline),
+            "created_at": to_epoch(self.created_at),
             "finished": self.finished,
-            "finished_at": self.finished_at.strftime("%Y-%m-%dT%H:%M") if self.finished else None
+            "finished_at": to_epoch(self.finished_at) if self.finished else None
         }
     
     @classmethod
-    def from_dict(cls, data):
-        """Returns the task as a task object from a dictionary."""
-        deadline = datetime.strptime(data["deadline"], "%Y-%m-%dT%H:%M") if data["deadline"] else None
-        task = cls(
+    def from_dict(cls, data, tags: list | None = None):
+        """Returns the task as a task object from a dictionary or a stored record.
+
+        Datetimes may be strings or epoch seconds; with tags (the store's tag
+        table), the task's tags are ids into it.
+        """
+        
+        return cls(
             type=data["type"],
             id=data["id"],
             title=data["title"],
             description=data["description"],
-            tags=data["tags"],
-            deadline=deadline
+            tags=[tags[tag_id] for tag_id in data["tags"]] if tags is not None else data["tags"],
+            deadline=data["deadline"],
+            created_at=data["created_at"],
+            finished=data["finished"],
+            finished_at=data["finished_at"]
         )
-        task.created_at = datetime.strptime(data["created_at"], "%Y-%m-%dT%H:%M")
-        task.finished = data["finished"]
+    
+    def update_from(self, other: "Task"):
+        """Copies the fields of another task into this one."""
+        
+        for field in Task.__slots__:  # not self.__slots__, which subclasses (LazyTask) leave empty
+            setattr(self, field, getattr(other, field))
+
+    def copy(self):
+        """Returns a plain Task with the same fields, and its own tag list."""
+        
+        task = Task.__new__(Task)
+        task.update_from(self)
+        task.tags = list(self.tags)
+        return task
+
+
+# ==================================================================
+# Deadline classification
+#                           Functions:
+# classify_deadlines() -> Returns the deadline status of every task, against one reference time.
+# bucket_deadlines() -> Returns the tasks grouped by deadline status.
+# next_status_change() -> Returns the last moment the deadline statuses of the tasks stay as they are.
+# ==================================================================
+
+def classify_deadlines(tasks: list, now: datetime | None = None):
+    """Returns the deadline status of every task, against one reference time.
+
+    Same rules as Task.get_time_left(): 'today' means due within 24 hours.
+    """
+    
+    now = now or datetime.now()
+    tomorrow = now + timedelta(days=1)
+    statuses = []
+    for task in tasks:
+        deadline = task.deadline
         if task.finished:
-            task.finished_at = datetime.strptime(data["finished_at"], "%Y-%m-%dT%H:%M")
+            statuses.append('finished')
+        elif deadline is None:
+            statuses.append('none')
+        elif deadline < now:
+            statuses.append('overdue')
+        elif deadline < tomorrow:
+            statuses.append('today')
         else:
-            task.finished_at = None
-        return task
+            statuses.append('upcoming')
+    return statuses
+
+
+def bucket_deadlines(tasks: list, now: datetime | None = None):
+    """Returns the tasks grouped by deadline status."""
+    
+    buckets = {status: [] for status in DEADLINE_STATUSES}
+    for task, status in zip(tasks, classify_deadlines(tasks, now)):
+        buckets[status].append(task)
+    return buckets
+
+
+def next_status_change(tasks: list, now: datetime | None = None):
+    """Returns the last moment the deadline statuses of the tasks stay as they are.
+
+    Statuses change right after a deadline, and right after a day before it;
+    None means they never change (only finished tasks or no deadlines).
+    """
     
-    
\ No newline at end of file
+    now = now or datetime.now()
+    moments = [moment for task in tasks if task.deadline is not None and not task.finished
+               for moment in (task.deadline - timedelta(days=1), task.deadline) if moment >= now]
+    return min(moments, default=None)
@@ -0,0 +1,176 @@
+#                            TASK ARCHIVE (v1.0.0)
+
+import gzip
+import json
+import os
+import threading
+from datetime import datetime
+
+from task_logic.task import Task, format_datetime
+from task_logic.task_cache import LRUCache
+from task_logic.task_index import TokenIndex
+
+ARCHIVE_TYPE = 'archive'  # task type archived tasks are returned with; they are read-only
+SEGMENT_CACHE = 8  # decoded segments kept in memory
+
+class TaskArchive:
+    """Finished tasks moved out of the working set, kept in gzip'd NDJSON segment files.
+
+    Segments are written once and never changed. The manifest lists them
+    with the ids each one holds, so a lookup decompresses one segment, and
+    recently used segments stay decoded in an LRU cache.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory: str, segment_cache: int = SEGMENT_CACHE):
+        self.directory = directory
+        self._segments = []    # manifest entries: {'file', 'ids', 'archived_at'}
+        self._segment_of = {}  # id -> segment file
+        self._manifest_state = None  # (inode, mtime) of the manifest last read
+        self._cache = LRUCache(segment_cache)  # segment file -> ({id: task}, TokenIndex)
+        self._lock = threading.Lock()  # guards the manifest state; readers run on several threads
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # add_segment() -> Writes tasks to a new segment and lists it in the manifest.
+    # get() -> Returns the archived task with the given id, or None.
+    # contains() -> Checks if a task with the given id is archived, without loading its segment.
+    # search() -> Returns the archived tasks matching a text query, best match first.
+    # count() -> Returns how many tasks are archived.
+    # _refresh() -> Rereads the manifest if it changed on disk (another process archived tasks).
+    # _stat_manifest() -> Returns the (inode, mtime) of the manifest, or None if there is none yet.
+    # _load_segment() -> Returns the tasks of a segment by id, and their search index.
+    # _write_file() -> Writes a file durably through a temporary file.
+    # ==================================================================
+
+    def add_segment(self, tasks: list):
+        """Writes tasks to a new segment and lists it in the manifest.
+
+        A task archived before (by an attempt that crashed before the tasks
+        left the working set) is written again, and the id index points to
+        the newest copy. Both files are fsynced before this returns, as the
+        caller drops the tasks from the store next.
+        """
+
+        if not tasks:
+            return
+        with self._lock:
+            self._refresh()
+            os.makedirs(self.directory, exist_ok=True)
+            file = f'segment-{len(self._segments) + 1:06d}.ndjson.gz'
+            lines = ''.join(json.dumps(task.to_dict(), ensure_ascii=False) + '\n' for task in tasks)
+            self._write_file(file, gzip.compress(lines.encode('utf-8')))
+
+            segment = {'file': file, 'ids': sorted(task.id for task in tasks),
+                       'archived_at': format_datetime(datetime.now())}
+            self._write_file(self.MANIFEST, json.dumps({'segments': self._segments + [segment]}).encode())
+            self._segments.append(segment)
+            self._segment_of.update((task_id, file) for task_id in segment['ids'])
+            self._manifest_state = self._stat_manifest()
+
+
+    def get(self, task_id: int):
+        """Returns the archived task with the given id, or None."""
+
+        with self._lock:
+            self._refresh()
+            file = self._segment_of.get(task_id)
+        return self._load_segment(file)[0].get(task_id) if file else None
+
+
+    def contains(self, task_id: int):
+        """Checks if a task with the given id is archived, without loading its segment."""
+
+        with self._lock:
+            self._refresh()
+            return task_id in self._segment_of
+
+
+    def search(self, query: str, limit: int | None = None):
+        """Returns the archived tasks matching a text query, best match first.
+
+        Every segment is searched, so this costs a decompression per segment
+        not in the cache; stores search the archive only when asked to.
+        """
+
+        with self._lock:
+            self._refresh()
+            files = [segment['file'] for segment in self._segments]
+            segment_of = self._segment_of
+        scored = []
+        for file in reversed(files):  # newest first, for equal scores
+            tasks, words = self._load_segment(file)
+            scored.extend((score, tasks[task_id]) for task_id, score in words.search(query)
+                          if segment_of.get(task_id) == file)  # not a copy archived again later
+        scored.sort(key=lambda item: -item[0])
+        return [task for _, task in (scored if limit is None else scored[:limit])]
+
+
+    def count(self):
+        """Returns how many tasks are archived."""
+
+        with self._lock:
+            self._refresh()
+            return len(self._segment_of)
+
+
+    def _refresh(self):
+        """Rereads the manifest if it changed on disk (another process archived tasks)."""
+
+        state = self._stat_manifest()
+        if state == self._manifest_state:
+            return
+        segments = []
+        if state is not None:
+            with open(os.path.join(self.directory, self.MANIFEST), 'r') as mf:
+                segments = json.load(mf)['segments']
+        self._segments = segments
+        self._segment_of = {task_id: segment['file'] for segment in segments for task_id in segment['ids']}
+        self._manifest_state = state
+
+
+    def _stat_manifest(self):
+        """Returns the (inode, mtime) of the manifest, or None if there is none yet."""
+
+        try:
+            stat = os.stat(os.path.join(self.directory, self.MANIFEST))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+
+    def _load_segment(self, file: str):
+        """Returns the tasks of a segment by id, and their search index."""
+
+        loaded = self._cache.get(file)
+        if loaded is None:
+            with gzip.open(os.path.join(self.directory, file), 'rt', encoding='utf-8') as sf:
+                tasks = {}
+                for line in sf:
+                    task = Task.from_dict(json.loads(line))
+                    task.type = ARCHIVE_TYPE
+                    tasks[task.id] = task
+            words = TokenIndex()
+            words.rebuild(tasks.values())
+            loaded = (tasks, words)
+            self._cache.put(file, loaded)
+        return loaded
+
+
+    def _write_file(self, name: str, data: bytes):
+        """Writes a file durably through a temporary file."""
+
+        path = os.path.join(self.directory, name)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        if os.name == 'posix':
+            fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
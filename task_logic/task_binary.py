@@ -0,0 +1,311 @@
+#                            TASK BINARY SNAPSHOT (v1.0.0)
+#
+# A compact snapshot format, read through mmap: opening one only parses the
+# header, and a task is decoded when it is asked for.
+#
+#   header      magic, format version, counts, store version and section offsets
+#   records     one fixed-size record per task, sorted by id; strings and tags
+#               are (offset, length) pairs into the sections below
+#   tag refs    u32 tag numbers, a run per task
+#   tag table   (offset, length) of each tag name
+#   string pool UTF-8 titles, descriptions and tag names
+#
+# Datetimes are whole minutes since 1970-01-01 (the stores keep minutes only),
+# and a task's type is stored as its position in TASK_TYPES.
+#
+#   python -m task_logic.task_binary to-binary task_data/data.json task_data/data.bin
+#   python -m task_logic.task_binary to-json task_data/data.bin task_data/data.json
+
+import json
+import mmap
+import struct
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import chain
+
+from task_logic.task import EPOCH, TASK_TYPES, Task
+from task_logic.task_cache import LRUCache
+
+MAGIC = b'TASKSNAP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHHIIQIQQQQ')  # magic, format version, -, tasks, latest id, store version,
+                                        # tags, records/tag refs/tag table/pool offsets
+RECORD = struct.Struct('<IBBHqqqIIIIII')  # id, type, finished, tag count, deadline, created_at,
+                                          # finished_at, title, description (offset, length), first tag ref, -
+DESCRIPTION_FIELD = struct.calcsize('<IBBHqqqII')  # where the description pair sits in a record
+U32 = struct.Struct('<I')  # a tag ref; also reads the id at the start of a record
+STRING = struct.Struct('<II')  # offset into the pool, length
+NO_DATETIME = -2 ** 63
+
+def _encode_datetime(value: datetime | None) -> int:
+    """Returns the minutes since EPOCH of a datetime, or NO_DATETIME."""
+
+    return NO_DATETIME if value is None else (value - EPOCH) // timedelta(minutes=1)
+
+
+def _decode_datetime(value: int):
+    """Returns the datetime of a number of minutes since EPOCH, or None."""
+
+    return None if value == NO_DATETIME else EPOCH + timedelta(minutes=value)
+
+
+class BinarySnapshot:
+    """A binary snapshot opened through mmap; tasks are decoded on access."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, format_version, _, self._count, self.latest_id, self.version, tag_count,
+         self._records, self._tag_refs, tag_table, self._pool) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} task snapshot")
+        self.tags = [self._string(tag_table + i * STRING.size) for i in range(tag_count)]
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # id_at() -> Returns the id of the i-th task, without decoding the rest of it.
+    # index_of() -> Returns the position of the task with the given id, or None.
+    # task_at() -> Decodes the i-th task (in id order).
+    # find() -> Returns the task with the given id, or None.
+    # description_of() -> Decodes only the description of the task with the given id, or None.
+    # to_tasks() -> Decodes every task into the layout of TaskJSON.tasks.
+    # close() -> Unmaps the file.
+    # _string() -> Decodes the pool string an (offset, length) pair points to.
+    # ==================================================================
+
+    def id_at(self, i: int) -> int:
+        """Returns the id of the i-th task, without decoding the rest of it."""
+
+        return U32.unpack_from(self._mm, self._records + i * RECORD.size)[0]
+
+
+    def index_of(self, task_id: int):
+        """Returns the position of the task with the given id, or None (a binary search over the records)."""
+
+        i = bisect_left(range(self._count), task_id, key=self.id_at)
+        return i if i < self._count and self.id_at(i) == task_id else None
+
+
+    def task_at(self, i: int) -> Task:
+        """Decodes the i-th task (in id order)."""
+
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        offset = self._records + i * RECORD.size
+        (task_id, type_code, finished, tag_count, deadline, created_at, finished_at,
+         title_offset, title_length, description_offset, description_length, first_tag, _) \
+            = RECORD.unpack_from(self._mm, offset)
+        pool = self._pool
+        tags = [self.tags[U32.unpack_from(self._mm, self._tag_refs + (first_tag + j) * U32.size)[0]]
+                for j in range(tag_count)]
+        return Task(TASK_TYPES[type_code], task_id,
+                    self._mm[pool + title_offset:pool + title_offset + title_length].decode('utf-8'),
+                    self._mm[pool + description_offset:pool + description_offset + description_length]
+                    .decode('utf-8'),
+                    tags, _decode_datetime(deadline), _decode_datetime(created_at), bool(finished),
+                    _decode_datetime(finished_at))
+
+
+    def find(self, task_id: int):
+        """Returns the task with the given id, or None."""
+
+        i = self.index_of(task_id)
+        return None if i is None else self.task_at(i)
+
+
+    def description_of(self, task_id: int):
+        """Decodes only the description of the task with the given id, or None."""
+
+        i = self.index_of(task_id)
+        if i is None:
+            return None
+        offset, length = STRING.unpack_from(self._mm, self._records + i * RECORD.size + DESCRIPTION_FIELD)
+        return self._mm[self._pool + offset:self._pool + offset + length].decode('utf-8')
+
+
+    def to_tasks(self):
+        """Decodes every task into the layout of TaskJSON.tasks."""
+
+        tasks = {'latest_id': self.latest_id, 'version': self.version, 'tags': list(self.tags),
+                 **{task_type: [] for task_type in TASK_TYPES}}
+        for task in self:
+            tasks[task.type].append(task)
+        return tasks
+
+
+    def close(self):
+        """Unmaps the file."""
+
+        self._mm.close()
+
+
+    def _string(self, offset: int) -> str:
+        """Decodes the pool string an (offset, length) pair points to."""
+
+        start, length = STRING.unpack_from(self._mm, offset)
+        return self._mm[self._pool + start:self._pool + start + length].decode('utf-8')
+
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (self.task_at(i) for i in range(self._count))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# ==================================================================
+# Lazy descriptions
+#                           Functions:
+# LazyTask -> Task whose description is read from a binary snapshot when asked for.
+# SnapshotDescriptions -> The descriptions of a binary snapshot, read through an LRU cache.
+#
+# A store loading lazily keeps every task in memory but its description, so
+# memory follows the list fields and indexes rather than the text.
+# ==================================================================
+
+_description_slot = Task.__dict__['description']  # the storage behind Task.description
+
+class LazyTask(Task):
+    """Task whose description is read from a binary snapshot when asked for.
+
+    The description slot holds None while the text is only on disk. Stores
+    make a subclass whose source is their SnapshotDescriptions, and release
+    a task (of that subclass or plain Task) by switching it to the subclass,
+    so the objects the indexes point to stay the same.
+    """
+
+    __slots__ = ()
+    source = None  # SnapshotDescriptions the description is read from
+
+    @property
+    def description(self):
+        text = _description_slot.__get__(self)
+        return self.source.get(self.id) if text is None else text
+
+    @description.setter
+    def description(self, value: str):
+        _description_slot.__set__(self, value)
+
+    @classmethod
+    def release(cls, task: Task):
+        """Drops the in-memory description of a task that is in the current snapshot."""
+
+        task.__class__ = cls
+        _description_slot.__set__(task, None)
+
+
+class SnapshotDescriptions:
+    """The descriptions of the binary partition files of a store, read through an LRU cache of hot ones."""
+
+    def __init__(self, maxsize: int):
+        self._cache = LRUCache(maxsize)
+        self._current = (0, {})  # (generation, partition -> BinarySnapshot), swapped in one assignment
+
+    def open(self, partition: str, path: str) -> BinarySnapshot:
+        """Switches a partition to a newly written file; the old mapping closes once no reader uses it."""
+
+        snapshot = BinarySnapshot(path)
+        generation, snapshots = self._current
+        self._current = (generation + 1, {**snapshots, partition: snapshot})
+        return snapshot
+
+
+    def get(self, task_id: int) -> str:
+        """Returns the description of a task, from the cache or the partition file holding it."""
+
+        generation, snapshots = self._current
+        key = (generation, task_id)  # an older file may hold an older text
+        text = self._cache.get(key)
+        if text is None:
+            text = next((text for snapshot in snapshots.values()
+                         if (text := snapshot.description_of(task_id)) is not None), '')
+            self._cache.put(key, text)
+        return text
+
+
+# ==================================================================
+# Writing and converting
+#                           Functions:
+# dump_snapshot() -> Writes tasks in the layout of TaskJSON.tasks as a binary snapshot.
+# json_to_binary() -> Converts a data.json snapshot to a binary one.
+# binary_to_json() -> Converts a binary snapshot to a data.json one.
+# ==================================================================
+
+def dump_snapshot(tasks: dict, f):
+    """Writes tasks in the layout of TaskJSON.tasks as a binary snapshot to a binary file.
+
+    Task types left out are written empty, so a single partition can be dumped.
+    """
+
+    pool = bytearray()
+    def add_string(text: str):
+        data = text.encode('utf-8')
+        pool.extend(data)
+        return len(pool) - len(data), len(data)
+
+    tag_numbers = {tag: i for i, tag in enumerate(tasks['tags'])}
+    tag_table = b''.join(STRING.pack(*add_string(tag)) for tag in tasks['tags'])
+    records = bytearray()
+    tag_refs = bytearray()
+    ref_count = 0
+    for task in sorted(chain(*(tasks.get(task_type, ()) for task_type in TASK_TYPES)), key=lambda task: task.id):
+        task_tags = [tag_numbers[tag] for tag in task.tags if tag in tag_numbers]
+        records += RECORD.pack(task.id, TASK_TYPES.index(task.type), task.finished, len(task_tags),
+                               _encode_datetime(task.deadline), _encode_datetime(task.created_at),
+                               _encode_datetime(task.finished_at if task.finished else None),
+                               *add_string(task.title), *add_string(task.description), ref_count, 0)
+        for number in task_tags:
+            tag_refs += U32.pack(number)
+        ref_count += len(task_tags)
+
+    records_offset = HEADER.size
+    tag_refs_offset = records_offset + len(records)
+    tag_table_offset = tag_refs_offset + len(tag_refs)
+    pool_offset = tag_table_offset + len(tag_table)
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(records) // RECORD.size, tasks['latest_id'],
+                        tasks.get('version', 0), len(tasks['tags']),
+                        records_offset, tag_refs_offset, tag_table_offset, pool_offset))
+    f.write(records)
+    f.write(tag_refs)
+    f.write(tag_table)
+    f.write(pool)
+
+
+def json_to_binary(json_path: str, binary_path: str):
+    """Converts a data.json snapshot to a binary one."""
+
+    with open(json_path, 'r') as jf:
+        tasks = json.load(jf)
+    for task_type in TASK_TYPES:
+        tasks[task_type] = [Task.from_dict(task) for task in tasks[task_type]]
+    with open(binary_path, 'wb') as bf:
+        dump_snapshot(tasks, bf)
+
+
+def binary_to_json(binary_path: str, json_path: str):
+    """Converts a binary snapshot to a data.json one."""
+
+    with BinarySnapshot(binary_path) as snapshot:
+        tasks = snapshot.to_tasks()
+    with open(json_path, 'w') as jf:
+        json.dump(tasks, jf, indent=4, default=Task.to_dict)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Converts task snapshots between data.json and the binary format.")
+    parser.add_argument('direction', choices=['to-binary', 'to-json'])
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args()
+    (json_to_binary if args.direction == 'to-binary' else binary_to_json)(args.source, args.target)
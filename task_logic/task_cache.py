@@ -0,0 +1,57 @@
+#                            TASK RENDER CACHE (v1.0.0)
+
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """Mapping of at most maxsize entries that evicts the least recently used one."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # requests are served on several threads
+        self.hits = 0
+        self.misses = 0
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # get() -> Returns the cached value of a key (marking it recently used), or default.
+    # put() -> Caches a value, evicting the least recently used entry when full.
+    # clear() -> Removes every entry.
+    # ==================================================================
+
+    def get(self, key, default=None):
+        """Returns the cached value of a key (marking it recently used), or default."""
+
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._entries[key]
+
+
+    def put(self, key, value):
+        """Caches a value, evicting the least recently used entry when full."""
+
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+    def clear(self):
+        """Removes every entry."""
+
+        with self._lock:
+            self._entries.clear()
+
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,408 @@
+#                            TASK INDEXES (v1.0.0)
+
+import math
+import re
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+
+from task_logic.task import Task
+
+# Sort keys offered by the task listings. Ties are broken by id, and tasks
+# without a deadline sort after the ones that have one.
+SORT_KEYS = {
+    'deadline': lambda task: (task.deadline is None, task.deadline or datetime.min),
+    'created_at': lambda task: task.created_at,
+    'title': lambda task: task.title.lower(),
+    'finished': lambda task: task.finished,
+}
+
+class SortedIndex:
+    """Keeps (key, id) pairs of a task list in order, so sorted pages need no re-sort."""
+
+    def __init__(self, key_func):
+        self.key_func = key_func
+        self.entries = []
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # add() -> Adds a task to the index.
+    # remove() -> Removes a task from the index.
+    # clear() -> Removes every task from the index.
+    # rebuild() -> Replaces the index with the given tasks, sorted once.
+    # ids() -> Returns the ids of a slice of the index.
+    # filtered_ids() -> Returns the ids of a slice of the index, keeping only the allowed ids.
+    # ==================================================================
+
+    def add(self, task: Task):
+        """Adds a task to the index."""
+
+        insort(self.entries, (self.key_func(task), task.id))
+
+
+    def remove(self, task: Task):
+        """Removes a task from the index."""
+
+        entry = (self.key_func(task), task.id)
+        i = bisect_left(self.entries, entry)
+        if i < len(self.entries) and self.entries[i] == entry:
+            del self.entries[i]
+
+
+    def clear(self):
+        """Removes every task from the index."""
+
+        self.entries.clear()
+
+
+    def rebuild(self, tasks: list):
+        """Replaces the index with the given tasks, sorted once."""
+
+        self.entries = sorted((self.key_func(task), task.id) for task in tasks)
+
+
+    def ids(self, offset: int = 0, limit: int | None = None, descending: bool = False):
+        """Returns the ids of a slice of the index."""
+
+        end = len(self.entries) if limit is None else min(offset + limit, len(self.entries))
+        if descending:
+            size = len(self.entries)
+            return [self.entries[size - 1 - i][1] for i in range(offset, end)]
+        return [entry[1] for entry in self.entries[offset:end]]
+
+
+    def filtered_ids(self, allowed: set, offset: int = 0, limit: int | None = None,
+                     descending: bool = False):
+        """Returns the ids of a slice of the index, keeping only the allowed ids."""
+
+        entries = reversed(self.entries) if descending else self.entries
+        return slice_ids((task_id for _, task_id in entries), allowed, offset, limit)
+
+
+    def __len__(self):
+        return len(self.entries)
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+TITLE_WEIGHT = 3  # a title hit counts as much as this many description hits
+PREFIX_WEIGHT = 0.5  # a prefix-only hit counts this much of an exact one
+
+def tokenize(text: str):
+    """Returns the lowercase word tokens of a text."""
+
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class DeadlineIndex(SortedIndex):
+    """Keeps the unfinished tasks that have a deadline ordered by deadline."""
+
+    def __init__(self):
+        super().__init__(lambda task: task.deadline)
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # add() -> Adds a task if it is unfinished and has a deadline.
+    # remove() -> Removes a task if it has a deadline.
+    # rebuild() -> Replaces the index with the given tasks.
+    # overdue() -> Returns the ids of the tasks whose deadline has passed, oldest first.
+    # due_within() -> Returns the ids of the tasks due between now and now + window.
+    # upcoming() -> Returns the ids of the next tasks due, soonest first.
+    # ==================================================================
+
+    def add(self, task: Task):
+        """Adds a task if it is unfinished and has a deadline."""
+
+        if task.deadline and not task.finished:
+            super().add(task)
+
+
+    def remove(self, task: Task):
+        """Removes a task if it has a deadline."""
+
+        if task.deadline:
+            super().remove(task)
+
+
+    def rebuild(self, tasks):
+        """Replaces the index with the given tasks."""
+
+        super().rebuild([task for task in tasks if task.deadline and not task.finished])
+
+
+    def overdue(self, now: datetime, limit: int | None = None):
+        """Returns the ids of the tasks whose deadline has passed, oldest first."""
+
+        end = bisect_left(self.entries, (now,))
+        if limit is not None:
+            end = min(end, limit)
+        return [entry[1] for entry in self.entries[:end]]
+
+
+    def due_within(self, now: datetime, window: timedelta, limit: int | None = None):
+        """Returns the ids of the tasks due between now and now + window."""
+
+        start = bisect_left(self.entries, (now,))
+        end = bisect_left(self.entries, (now + window,))
+        if limit is not None:
+            end = min(end, start + limit)
+        return [entry[1] for entry in self.entries[start:end]]
+
+
+    def upcoming(self, now: datetime, count: int):
+        """Returns the ids of the next tasks due, soonest first."""
+
+        start = bisect_left(self.entries, (now,))
+        return [entry[1] for entry in self.entries[start:start + count]]
+
+
+class FinishDateIndex:
+    """Groups the finished tasks by the day they were finished."""
+
+    def __init__(self):
+        self.ids_by_day = {}  # date -> ids of the tasks finished that day
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # add() -> Adds a task under the day it was finished, if it is finished.
+    # remove() -> Removes a task from the day it was finished.
+    # clear() -> Removes every task from the index.
+    # rebuild() -> Replaces the index with the given tasks.
+    # finished_before() -> Returns the ids of the tasks finished before a day, in id order.
+    # ==================================================================
+
+    def add(self, task: Task):
+        """Adds a task under the day it was finished, if it is finished."""
+
+        if task.finished and task.finished_at:
+            self.ids_by_day.setdefault(task.finished_at.date(), set()).add(task.id)
+
+
+    def remove(self, task: Task):
+        """Removes a task from the day it was finished."""
+
+        if task.finished and task.finished_at:
+            day = task.finished_at.date()
+            ids = self.ids_by_day.get(day)
+            if ids is not None:
+                ids.discard(task.id)
+                if not ids:
+                    del self.ids_by_day[day]
+
+
+    def clear(self):
+        """Removes every task from the index."""
+
+        self.ids_by_day.clear()
+
+
+    def rebuild(self, tasks):
+        """Replaces the index with the given tasks."""
+
+        self.ids_by_day = {}
+        for task in tasks:
+            self.add(task)
+
+
+    def finished_before(self, day: date):
+        """Returns the ids of the tasks finished before a day, in id order (only earlier days are visited)."""
+
+        return sorted(task_id for finished_on, ids in self.ids_by_day.items() if finished_on < day
+                      for task_id in ids)
+
+
+class TagIndex:
+    """Maps each tag to the ids of the tasks carrying it (an inverted index)."""
+
+    def __init__(self):
+        self.ids_by_tag = {}
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # add() -> Adds a task under each of its tags.
+    # remove() -> Removes a task from each of its tags.
+    # clear() -> Removes every task from the index.
+    # rebuild() -> Replaces the index with the given tasks.
+    # ids() -> Returns the ids of the tasks with all (or any) of the given tags.
+    # ==================================================================
+
+    def add(self, task: Task):
+        """Adds a task under each of its tags."""
+
+        for tag in task.tags:
+            self.ids_by_tag.setdefault(tag, set()).add(task.id)
+
+
+    def remove(self, task: Task):
+        """Removes a task from each of its tags."""
+
+        for tag in task.tags:
+            ids = self.ids_by_tag.get(tag)
+            if ids is not None:
+                ids.discard(task.id)
+                if not ids:
+                    del self.ids_by_tag[tag]
+
+
+    def clear(self):
+        """Removes every task from the index."""
+
+        self.ids_by_tag.clear()
+
+
+    def rebuild(self, tasks: list):
+        """Replaces the index with the given tasks."""
+
+        self.ids_by_tag = {}
+        for task in tasks:
+            self.add(task)
+
+
+    def ids(self, tags: list, match_all: bool = True):
+        """Returns the ids of the tasks with all (or any) of the given tags."""
+
+        sets = [self.ids_by_tag.get(tag, set()) for tag in tags]
+        if not sets:
+            return set()
+        if match_all:
+            sets.sort(key=len)  # intersect starting from the rarest tag
+            return sets[0].intersection(*sets[1:])
+        return set().union(*sets)
+
+
+def slice_ids(ordered_ids, allowed: set, offset: int = 0, limit: int | None = None):
+    """Returns a slice of the ordered ids that are in allowed, stopping once it is full."""
+
+    page = []
+    skipped = 0
+    for task_id in ordered_ids:
+        if task_id not in allowed:
+            continue
+        if skipped < offset:
+            skipped += 1
+            continue
+        if limit is not None and len(page) >= limit:
+            break
+        page.append(task_id)
+    return page
+
+
+class TokenIndex:
+    """Inverted index of title/description tokens with prefix matching and tf-idf ranking.
+
+    With descriptions=False only titles are indexed, so the index does not
+    hold the words of descriptions a lazy store keeps out of memory.
+    """
+
+    def __init__(self, descriptions: bool = True):
+        self.descriptions = descriptions
+        self.postings = {}    # token -> {id: weight}
+        self.vocabulary = []  # sorted tokens, for prefix lookups
+        self.doc_tokens = {}  # id -> tokens, so a task can be removed
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # add() -> Adds the title and description tokens of a task.
+    # remove() -> Removes the tokens of a task.
+    # clear() -> Removes every task from the index.
+    # rebuild() -> Replaces the index with the given tasks.
+    # _add() -> Adds the tokens of a task.
+    # search() -> Returns (id, score) pairs of the tasks matching every query term, best first.
+    # _expand() -> Returns the indexed tokens a query term matches, with their weight.
+    # ==================================================================
+
+    def add(self, task: Task):
+        """Adds the title and description tokens of a task."""
+
+        self._add(task, lambda token: insort(self.vocabulary, token))
+
+
+    def remove(self, task: Task):
+        """Removes the tokens of a task."""
+
+        for token in self.doc_tokens.pop(task.id, []):
+            postings = self.postings[token]
+            postings.pop(task.id, None)
+            if not postings:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+
+    def clear(self):
+        """Removes every task from the index."""
+
+        self.postings.clear()
+        self.vocabulary.clear()
+        self.doc_tokens.clear()
+
+
+    def rebuild(self, tasks):
+        """Replaces the index with the given tasks."""
+
+        self.clear()
+        for task in tasks:
+            self._add(task, self.vocabulary.append)
+        self.vocabulary.sort()  # once, instead of an insort per new token
+
+
+    def _add(self, task: Task, add_to_vocabulary):
+        """Adds the tokens of a task, handing tokens seen for the first time to add_to_vocabulary."""
+
+        weights = {}
+        for token in tokenize(task.title):
+            weights[token] = weights.get(token, 0) + TITLE_WEIGHT
+        if self.descriptions:
+            for token in tokenize(task.description):
+                weights[token] = weights.get(token, 0) + 1
+        for token, weight in weights.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = {}
+                add_to_vocabulary(token)
+            postings[task.id] = weight
+        self.doc_tokens[task.id] = list(weights)
+
+
+    def search(self, query: str, limit: int | None = None):
+        """Returns (id, score) pairs of the tasks matching every query term, best first."""
+
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        size = max(len(self.doc_tokens), 1)
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token, match_weight in self._expand(term):
+                postings = self.postings[token]
+                idf = math.log(1 + size / len(postings))
+                for task_id, weight in postings.items():
+                    score = weight * idf * match_weight
+                    if score > term_scores.get(task_id, 0):
+                        term_scores[task_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {task_id: score + term_scores[task_id]
+                          for task_id, score in scores.items() if task_id in term_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if limit is None else ranked[:limit]
+
+
+    def _expand(self, term: str):
+        """Returns the indexed tokens a query term matches, with their weight."""
+
+        matches = []
+        i = bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            token = self.vocabulary[i]
+            matches.append((token, 1.0 if token == term else PREFIX_WEIGHT))
+            i += 1
+        return matches
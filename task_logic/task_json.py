@@ -1,122 +1,907 @@
 #                            TASK MANAGER JSON DATABASE (v1.0.0)
 
+import atexit
 import json
 import os
-from datetime import datetime
+import threading
+from bisect import bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+from itertools import chain
+
+from task_logic.task import TASK_TYPES, Task, parse_datetime, to_epoch
+from task_logic.task_archive import ARCHIVE_TYPE, TaskArchive
+from task_logic.task_binary import BinarySnapshot, LazyTask, SnapshotDescriptions, dump_snapshot
+from task_logic.task_index import SORT_KEYS, DeadlineIndex, FinishDateIndex, SortedIndex, TagIndex, TokenIndex, slice_ids
+from task_logic.task_lock import FileLock
+from task_logic.task_metrics import BYTES_WRITTEN, SNAPSHOT_WRITE_SECONDS, instrumented
+from task_logic.task_storage import DURABILITY_LEVELS, SNAPSHOT_FORMATS
+
+META = 'meta'  # partition of latest_id, version and tags; its file lists the task type partition files
+# Layout of the json files: 1 kept datetimes as 'YYYY-MM-DDTHH:MM' strings and tags by name,
+# 2 epoch seconds of the host's time zone and tags as ids into the tag table, 3 the same with
+# epoch seconds of the wall-clock time, whatever the time zone (see Task.to_record).
+SCHEMA_VERSION = 3
+DATETIME_FIELDS = ('deadline', 'created_at', 'finished_at')
+
+def _reads(method):
+    """Runs a getter under the shared store lock, after catching up with other processes."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._is_stale():
+            with self._lock.exclusive():  # reloading changes what other threads read
+                self._sync()
+        with self._lock.shared():
+            return method(self, *args, **kwargs)
+    return instrumented(wrapper)
+
+
+def _writes(method):
+    """Runs a mutator in a transaction, which holds the exclusive store lock."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.transaction():
+            return method(self, *args, **kwargs)
+    return instrumented(wrapper)
+
+
+def _fsync_path(path: str):
+    """Forces a file (or, on POSIX, a directory's entries) to disk."""
+
+    if os.name != 'posix' and os.path.isdir(path):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _from_local_epochs(data: dict):
+    """Returns a schema 2 task record with its epoch seconds, which count host time, as datetimes."""
+
+    return {**data, **{field: datetime.fromtimestamp(data[field])
+                       for field in DATETIME_FIELDS if isinstance(data.get(field), int)}}
+
 
 class TaskJSON:
-    JFILE = './task_data/data.json'
+    PARTITION_DIR = './task_data/partitions'  # the snapshot: a file per task type, and meta.json
+    JFILE = './task_data/data.json'  # single-file snapshot from before partitions, taken over on first start
+    BFILE = './task_data/data.bin'   # the same in the binary format (see task_binary)
+    ARCHIVE_DIR = './task_data/archive'  # segments of archived tasks (see task_archive)
+    LOG_FILE = './task_data/data.log'
+    LOCK_FILE = './task_data/data.lock'  # advisory lock shared by every process using the store
+    IDS_FILE = './task_data/data.ids'  # highest id any process handed out, flushed or not
+    COMPACT_AFTER = 1000  # journal records kept before folding them into the snapshot
+                          # (at least one per task, so big stores are not rewritten every few changes)
+    GROUP_COMMIT_INTERVAL = None  # seconds between flushes; None flushes after every change
+    DURABILITY = 'none'  # when writes are fsynced: 'none', 'commit' (every flush) or 'periodic'
+    SNAPSHOT_FORMAT = 'json'  # partition files in 'json' or 'binary' (see task_binary)
+    DESCRIPTION_CACHE = 1024  # descriptions a lazy store keeps in memory
+    ARCHIVE_AFTER_DAYS = 30  # days since finishing after which archive_finished() moves overall tasks
+    FSYNC_INTERVAL = 1.0  # seconds between fsyncs in 'periodic' durability
 
-    def __init__(self):
+    def __init__(self, journal: bool = True, group_commit_interval: float | None = None,
+                 durability: str | None = None, snapshot_format: str | None = None, lazy: bool = False,
+                 archive_after_days: float | None = None, data_dir: str | None = None):
+        if data_dir is not None:  # the store's files there instead of ./task_data
+            os.makedirs(data_dir, exist_ok=True)
+            self.PARTITION_DIR = os.path.join(data_dir, 'partitions')
+            self.JFILE = os.path.join(data_dir, 'data.json')
+            self.BFILE = os.path.join(data_dir, 'data.bin')
+            self.ARCHIVE_DIR = os.path.join(data_dir, 'archive')
+            self.LOG_FILE = os.path.join(data_dir, 'data.log')
+            self.LOCK_FILE = os.path.join(data_dir, 'data.lock')
+            self.IDS_FILE = os.path.join(data_dir, 'data.ids')
+        self.journal = journal  # append changes to LOG_FILE instead of rewriting the snapshot
+        self.group_commit_interval = group_commit_interval or self.GROUP_COMMIT_INTERVAL
+        self.durability = durability or self.DURABILITY
+        if self.durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {self.durability}")
+        self.lazy = lazy  # keep descriptions in the binary snapshot until they are read
+        self.snapshot_format = snapshot_format or ('binary' if lazy else self.SNAPSHOT_FORMAT)
+        if self.snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Unknown snapshot format: {self.snapshot_format}")
+        if lazy and self.snapshot_format != 'binary':
+            raise ValueError("Lazy loading needs the binary snapshot format")
+        self.meta_file = os.path.join(self.PARTITION_DIR, META + '.json')
         self.tasks = {
             "latest_id": 0,
+            "version": 0,  # bumped by every change, so readers can tell what they have seen
             "tags": [],
-            "daily": [],
-            "overall": []
+            **{task_type: [] for task_type in TASK_TYPES}
         }
-        self._setup_json() 
+        self._partition_files = {}  # partition -> its file in PARTITION_DIR, as meta.json lists them
+        self._dirty = set()  # partitions (task types, META) changed since their files were written
+        self._unremoved = set()  # replaced partition files still open elsewhere (Windows); retried on write
+        self._log_records = 0
+        self._depth = 0        # nesting level of transaction()
+        self._pending = []     # change records not flushed yet
+        self._flush_timer = None
+        self._reserved = None  # highest id reserved while holding the lock, not in IDS_FILE yet
+        self._unsynced = set()  # files written but not fsynced yet ('periodic' durability)
+        self._fsync_timer = None
+        self._ids = {}     # id -> (task_type, task)
+        self._titles = {}  # (task_type, title) -> ids (an edit can give two tasks one title)
+        self._sorted = {task_type: {key: SortedIndex(key_func) for key, key_func in SORT_KEYS.items()}
+                        for task_type in TASK_TYPES}  # task_type -> sort key -> index
+        self._tagged = {task_type: TagIndex() for task_type in TASK_TYPES}  # task_type -> tag -> ids
+        self._tag_names = set()  # membership set for tasks['tags']
+        self._words = TokenIndex(descriptions=not lazy)  # search index; titles only when descriptions stay on disk
+        self._deadlines = DeadlineIndex()  # unfinished tasks by deadline
+        self._finished_daily = FinishDateIndex()  # finished daily tasks by the day they were finished
+        if lazy:
+            self._descriptions = SnapshotDescriptions(self.DESCRIPTION_CACHE)
+            self._lazy_task = type('LazyTask', (LazyTask,), {'__slots__': (), 'source': self._descriptions})
+        self._archive = TaskArchive(self.ARCHIVE_DIR)
+        self._lock = FileLock(self.LOCK_FILE)
+        self._snapshot_state = None  # (inode, size, mtime) of meta.json last read or written
+        self._log_state = None       # (inode, offset) of the journal read or written so far
+        with self._lock.exclusive():
+            self._setup_json()
+            # A store opened without the journal still picks up pending records.
+            if not self.journal or self._log_records >= max(self.COMPACT_AFTER, len(self._ids)):
+                self._compact()
+        if self.group_commit_interval:
+            atexit.register(self.flush)
+        if self.durability == 'periodic':
+            atexit.register(self._fsync_unsynced)
+        if archive_after_days is not None:
+            self.archive_finished(archive_after_days)
 
     # ==================================================================
     # Internal helpers (file + count)
     #                           Functions:
-    # _setup_json() -> Creates the json file if it doesn't exist and loads the tasks from it.
-    # _update_json() -> Saves the tasks to the json file.
-    # _increment_id() -> Returns the next available id.
+    # _setup_json() -> Creates the snapshot if it doesn't exist and loads the tasks from it.
+    # _load_partitions() -> Loads the tasks from the partition files meta.json lists; returns their schema.
+    # _load_partition() -> Returns the tasks of a json or binary partition file.
+    # _load_snapshot() -> Loads the tasks from a single-file snapshot (from before partitions).
+    # _release_descriptions() -> Drops the descriptions of the tasks of some partitions (lazy stores).
+    # _update_json() -> Saves the changed partitions to new files, and meta.json listing them.
+    # _remove_replaced() -> Removes partition files meta.json no longer lists.
+    # _write_snapshot_file() -> Writes a file of the snapshot through a temporary file.
+    # _replay_log() -> Applies the journal records from offset on top of the loaded tasks.
+    # _append_log() -> Appends change records to the journal.
+    # _written() -> Makes a written file durable as the durability level asks.
+    # _fsync_unsynced() -> Fsyncs the files written since the last periodic fsync.
+    # _disk_state() -> Returns stamps of the snapshot and journal files as they are on disk.
+    # _is_stale() -> Checks if another process changed the files since this one last read or wrote them.
+    # _sync() -> Catches up with changes another process made to the files.
+    # _reload() -> Reloads the whole store from the files.
+    # _rebase() -> Reloads the store and applies unflushed change records on top again.
+    # _commit() -> Applies a change record and queues it to be persisted.
+    # _queued() -> Returns the record to queue, with its own copy of the task.
+    # _undo() -> Drops the change records queued since a mark, reloading the store and applying the earlier ones again.
+    # _persist() -> Flushes now, or schedules a flush in group commit mode.
+    # _apply() -> Applies a change record to the tasks in memory.
+    # _build_indexes() -> Rebuilds the task indexes from the tasks.
+    # _index_task() -> Adds a task to the task indexes.
+    # _unindex_task() -> Removes a task from the task indexes.
+    # _set_finished() -> Sets the finished status of a task, updating only the indexes that depend on it.
+    # _find_task() -> Returns the task with the given id if it belongs to the given type.
+    # _increment_id() -> Returns the next available id, reserved so no other process hands it out before it is flushed.
+    # _read_reserved() -> Returns the highest id reserved in IDS_FILE, 0 if there is none.
+    # _save_reserved() -> Writes the ids reserved since the lock was taken to IDS_FILE.
     # _add_tags() -> Adds new tags to the list of tags.
     # ==================================================================
         
     def _setup_json(self):
-        """Creates the json file if it doesn't exist and loads the tasks from it."""
+        """Creates the snapshot if it doesn't exist and loads the tasks from it.
+
+        A file that cannot be read raises, rather than starting empty and
+        overwriting it with the next change. A store started where only a
+        single-file snapshot (data.json or data.bin) exists takes its tasks
+        over, and partitions in the other format or an older schema are
+        rewritten in this one.
+        """
         
-        try:
-            if not os.path.exists(self.JFILE):
-                self._update_json()
-            else:
-                with open(self.JFILE, 'r') as jf:
-                    self.tasks = json.load(jf)
-        except Exception as e:
-            print("Error:", e)
+        self._dirty = set()
+        schema = SCHEMA_VERSION
+        if os.path.exists(self.meta_file):
+            schema = self._load_partitions()
+            self._snapshot_state = self._disk_state()[0]
+        else:
+            legacy = [self.BFILE, self.JFILE] if self.snapshot_format == 'binary' else [self.JFILE, self.BFILE]
+            for path in legacy:
+                if os.path.exists(path):
+                    self._load_snapshot(path)
+                    break
+            self._dirty.update(TASK_TYPES + (META,))
+        self._build_indexes()  # the search index needs the descriptions once
+        if schema == 2:
+            # the journal counts host time too: fold it into the new snapshot, which drops it
+            self._replay_log(local_epochs=True)
+            self._compact()
+        else:
+            self._update_json()  # only the partitions still to be written or converted
+        if self.lazy:
+            self._release_descriptions(TASK_TYPES)
+        if schema != 2:
+            self._replay_log()
+            
+            
+    def _load_partitions(self):
+        """Loads the tasks from the partition files meta.json lists; returns their schema.
+
+        A task type with no partition file yet (added since the snapshot was
+        written) starts empty; partitions of types no longer known are kept
+        listed but not loaded. Json partitions of an older schema are marked
+        to be written again in the current one.
+        """
+        
+        with open(self.meta_file, 'r') as mf:
+            meta = json.load(mf)
+        schema = meta.get('schema', 1)
+        if schema > SCHEMA_VERSION:
+            raise ValueError(f"{self.meta_file} has schema {schema}; this version reads up to {SCHEMA_VERSION}")
+        self._partition_files = meta['partitions']
+        self.tasks = {'latest_id': meta['latest_id'], 'version': meta['version'], 'tags': meta['tags']}
+        extension = '.bin' if self.snapshot_format == 'binary' else '.json'
+        for task_type in TASK_TYPES:
+            file = self._partition_files.get(task_type)
+            self.tasks[task_type] = self._load_partition(task_type, file, schema) if file else []
+            if not file or not file.endswith(extension) or (file.endswith('.json') and schema < SCHEMA_VERSION):
+                self._dirty.add(task_type)
+        if self._dirty or schema < SCHEMA_VERSION:
+            self._dirty.add(META)
+        return schema
+            
+            
+    def _load_partition(self, task_type: str, file: str, schema: int = SCHEMA_VERSION):
+        """Returns the tasks of a json or binary partition file."""
+        
+        path = os.path.join(self.PARTITION_DIR, file)
+        if file.endswith('.bin'):
+            if self.lazy:
+                return list(self._descriptions.open(task_type, path))  # stays mapped
+            with BinarySnapshot(path) as snapshot:
+                return list(snapshot)
+        tags = self.tasks['tags'] if schema >= 2 else None  # tag ids, resolved to the table's own strings
+        with open(path, 'r') as pf:
+            if schema == 2:
+                return [Task.from_dict(_from_local_epochs(task), tags) for task in json.load(pf)]
+            return [Task.from_dict(task, tags) for task in json.load(pf)]
+            
+            
+    def _load_snapshot(self, path: str):
+        """Loads the tasks from a single-file snapshot, json or binary (from before partitions)."""
+        
+        if path == self.BFILE:
+            with BinarySnapshot(path) as snapshot:
+                self.tasks = snapshot.to_tasks()
+            return
+        with open(path, 'r') as jf:
+            self.tasks = json.load(jf)
+        self.tasks.setdefault('version', 0)  # snapshots from before versioning
+        for task_type in TASK_TYPES:
+            self.tasks[task_type] = [Task.from_dict(task) for task in self.tasks.get(task_type, [])]
+            
+            
+    def _release_descriptions(self, task_types):
+        """Drops the descriptions of the tasks of some partitions; all of them must be in the partition files.
+
+        They are read back from the files, through an LRU cache, when asked for.
+        """
+        
+        for task_type in task_types:
+            for task in self.tasks[task_type]:
+                self._lazy_task.release(task)
             
             
     def _update_json(self):
-        """Saves the tasks to the json file."""
+        """Saves the changed partitions to new files, and meta.json listing them.
+
+        meta.json is replaced through a temporary file only once the new
+        partition files are written, and the files it no longer lists are
+        removed after, so a crash leaves either the old snapshot or the new
+        one, never a mix. Partitions that did not change are not rewritten.
+        """
+        
+        if not self._dirty:
+            return
+        os.makedirs(self.PARTITION_DIR, exist_ok=True)
+        binary = self.snapshot_format == 'binary'
+        written = {}  # partition -> its new file
+        with SNAPSHOT_WRITE_SECONDS.time():
+            for task_type in TASK_TYPES:
+                if task_type not in self._dirty:
+                    continue
+                # a new name, so the file meta.json lists now stays valid until meta.json is replaced
+                file = f"{task_type}.{self.tasks['version']}{'.bin' if binary else '.json'}"
+                if file == self._partition_files.get(task_type):  # rewritten at the same version
+                    file = f"{task_type}.{self.tasks['version']}.1{'.bin' if binary else '.json'}"
+                tasks = self.tasks[task_type]
+                if binary:
+                    partition = {'latest_id': self.tasks['latest_id'], 'version': self.tasks['version'],
+                                 'tags': self.tasks['tags'], task_type: tasks}
+                    self._write_snapshot_file(file, lambda f: dump_snapshot(partition, f), binary)
+                else:
+                    tag_ids = {tag: tag_id for tag_id, tag in enumerate(self.tasks['tags'])}
+                    self._write_snapshot_file(file, lambda f: json.dump([task.to_record(tag_ids) for task in tasks],
+                                                                        f, indent=4), binary)
+                written[task_type] = file
+            if written and self.durability != 'none':
+                _fsync_path(self.PARTITION_DIR)  # the new files must be there before meta.json lists them
+            files = {**self._partition_files, **written}
+            meta = {'schema': SCHEMA_VERSION, 'latest_id': self.tasks['latest_id'],
+                    'version': self.tasks['version'], 'tags': self.tasks['tags'], 'partitions': files}
+            self._write_snapshot_file(META + '.json', lambda f: json.dump(meta, f, indent=4), False)
+        self._snapshot_state = self._disk_state()[0]
+        self._written(self.PARTITION_DIR)
+        if self.lazy:
+            # every task of a written partition is in its new file, pending changes included
+            for task_type, file in written.items():
+                self._descriptions.open(task_type, os.path.join(self.PARTITION_DIR, file))
+            self._release_descriptions(written)
+        replaced = {self._partition_files.get(task_type) for task_type in written} - {None}
+        self._partition_files = files
+        self._remove_replaced(replaced | self._unremoved)
+        self._dirty.clear()
+            
+            
+    def _remove_replaced(self, old_files: set):
+        """Removes partition files meta.json no longer lists.
+
+        On Windows a file still mapped for lazy descriptions (here, or by
+        another process) cannot be removed; it is tried again after the next
+        write, once its readers are likely done.
+        """
+        
+        self._unremoved = set()
+        for file in old_files - set(self._partition_files.values()):
+            try:
+                os.remove(os.path.join(self.PARTITION_DIR, file))
+            except FileNotFoundError:
+                pass
+            except PermissionError:
+                self._unremoved.add(file)
+            
+            
+    def _write_snapshot_file(self, file: str, dump, binary: bool):
+        """Writes a file of the snapshot through a temporary file; dump(f) writes the content."""
         
-        with open(self.JFILE, 'w') as jf:
-            json.dump(self.tasks, jf, indent=4)
+        path = os.path.join(self.PARTITION_DIR, file)
+        with open(path + '.tmp', 'wb' if binary else 'w') as f:
+            dump(f)
+            if self.durability != 'none':
+                # even 'periodic' must not rename a file whose data may not be on disk yet
+                f.flush()
+                os.fsync(f.fileno())
+            BYTES_WRITTEN.inc('snapshot', amount=f.tell())
+        os.replace(path + '.tmp', path)
         
              
+    def _replay_log(self, offset: int = 0, local_epochs: bool = False):
+        """Applies the journal records from offset on top of the loaded tasks.
+
+        Records the snapshot already holds (no newer than its version; left
+        by a crash during compaction) are skipped. With local_epochs, the
+        journal was written with schema 2 epoch seconds.
+        """
+        
+        if not os.path.exists(self.LOG_FILE):
+            self._log_state = None
+            return
+        with open(self.LOG_FILE, 'rb') as lf:
+            lf.seek(offset)
+            for line in lf:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn last record from an interrupted append
+                offset += len(line)
+                self._log_records += 1
+                if record.get('version', self.tasks['version'] + 1) <= self.tasks['version']:
+                    continue
+                if local_epochs:
+                    if 'task' in record:
+                        record['task'] = _from_local_epochs(record['task'])
+                    if isinstance(record.get('finished_at'), int):
+                        record['finished_at'] = datetime.fromtimestamp(record['finished_at'])
+                if 'task' in record:
+                    record['task'] = Task.from_dict(record['task'])
+                self._apply(record)
+            self._log_state = (os.fstat(lf.fileno()).st_ino, offset)
+        
+        
+    def _append_log(self, records: list):
+        """Appends change records to the journal."""
+        
+        created = self._log_state is None
+        with open(self.LOG_FILE, 'ab') as lf:
+            end = self._log_state[1] if self._log_state else 0
+            if lf.tell() > end:
+                lf.truncate(end)  # drop a torn record, or it would swallow the next one
+            data = ''.join(json.dumps(record, default=Task.to_record) + '\n' for record in records).encode()
+            lf.write(data)
+            BYTES_WRITTEN.inc('journal', amount=len(data))
+            self._log_state = (os.fstat(lf.fileno()).st_ino, lf.tell())
+        self._written(self.LOG_FILE)
+        if created:
+            self._written(os.path.dirname(self.LOG_FILE) or '.')
+        self._log_records += len(records)
+        if self._log_records >= max(self.COMPACT_AFTER, len(self._ids)):
+            self._compact()
+        
+        
+    def _written(self, path: str):
+        """Makes a written file durable as the durability level asks."""
+        
+        if self.durability == 'commit':
+            _fsync_path(path)
+        elif self.durability == 'periodic':
+            self._unsynced.add(path)
+            if self._fsync_timer is None:
+                self._fsync_timer = threading.Timer(self.FSYNC_INTERVAL, self._fsync_unsynced)
+                self._fsync_timer.daemon = True
+                self._fsync_timer.start()
+        
+        
+    def _fsync_unsynced(self):
+        """Fsyncs the files written since the last periodic fsync."""
+        
+        self._fsync_timer = None
+        paths = list(self._unsynced)  # one step under the GIL, while writers may add more
+        self._unsynced.difference_update(paths)
+        for path in paths:
+            try:
+                _fsync_path(path)
+            except FileNotFoundError:
+                pass  # journal compacted away meanwhile
+        
+        
+    def _disk_state(self):
+        """Returns stamps of the snapshot and journal files as they are on disk."""
+        
+        try:
+            stat = os.stat(self.meta_file)
+            snapshot = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            snapshot = None
+        try:
+            stat = os.stat(self.LOG_FILE)
+            log = (stat.st_ino, stat.st_size)
+        except FileNotFoundError:
+            log = None
+        return snapshot, log
+        
+        
+    def _is_stale(self):
+        """Checks if another process changed the files since this one last read or wrote them."""
+        
+        if self._pending:
+            return False  # unflushed group commit; flush() rebases it
+        return self._disk_state() != (self._snapshot_state, self._log_state)
+        
+        
+    def _sync(self):
+        """Catches up with changes another process made to the files.
+
+        When only the journal grew, just the new records are replayed,
+        otherwise the store is reloaded.
+        """
+        
+        if not self._is_stale():
+            return
+        snapshot, log = self._disk_state()
+        if snapshot == self._snapshot_state and log and (
+                self._log_state is None or (log[0] == self._log_state[0] and log[1] > self._log_state[1])):
+            self._replay_log(self._log_state[1] if self._log_state else 0)
+        else:
+            self._reload()
+        
+        
+    def _reload(self):
+        """Reloads the whole store from the files."""
+        
+        self.tasks = {
+            "latest_id": 0,
+            "version": 0,  # bumped by every change, so readers can tell what they have seen
+            "tags": [],
+            **{task_type: [] for task_type in TASK_TYPES}
+        }
+        self._log_records = 0
+        self._setup_json()
+        
+        
+    def _rebase(self, records: list):
+        """Reloads the store and applies unflushed change records on top again.
+
+        Ids are reserved in IDS_FILE, so tasks added here keep theirs; only
+        a store that did not reserve them (written before IDS_FILE) can have
+        used one too, and then the task gets a new id that the later records
+        follow. A task whose title another process took meanwhile is renamed
+        "title (2)", "title (3)"..., as the other task was written first.
+        """
+        
+        self._reload()
+        new_ids = {}
+        for record in records:
+            task = record.get('task')
+            if record['op'] == 'add' and task.id in self._ids:
+                new_ids[task.id] = self._increment_id()
+            if record['op'] == 'add' and (record['type'], task.title) in self._titles:
+                title, n = task.title, 2
+                while (record['type'], f'{title} ({n})') in self._titles:
+                    n += 1
+                task.title = f'{title} ({n})'
+            if task is not None:
+                task.id = new_ids.get(task.id, task.id)
+            if 'id' in record:
+                record['id'] = new_ids.get(record['id'], record['id'])
+            if 'ids' in record:
+                record['ids'] = [new_ids.get(task_id, task_id) for task_id in record['ids']]
+            record['version'] = self.tasks['version'] + 1
+            self._apply(record)
+        
+        
+    def _commit(self, record: dict):
+        """Applies a change record and queues it to be persisted."""
+        
+        record['version'] = self.tasks['version'] + 1
+        self._apply(record)
+        self._pending.append(self._queued(record))
+        if self._depth == 0:
+            self._persist()
+        
+        
+    def _queued(self, record: dict):
+        """Returns the record to queue, with its own copy of the task.
+
+        The store keeps the record's task object and changes it in place
+        later, which must not alter the queued record.
+        """
+        
+        if 'task' in record:
+            return {**record, 'task': record['task'].copy()}
+        return record
+        
+        
+    def _undo(self, mark: int):
+        """Drops the change records queued since mark, by reloading the store and applying the earlier ones again."""
+        
+        kept, self._pending = self._pending[:mark], []
+        self._reserved = None  # the ids the block took are free again
+        self._rebase(kept)
+        self._pending = [self._queued(record) for record in kept]
+        
+        
+    def _persist(self):
+        """Flushes now, or schedules a flush in group commit mode."""
+        
+        if not self.group_commit_interval:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.group_commit_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        
+        
+    def _apply(self, record: dict):
+        """Applies a change record to the tasks in memory.
+
+        Records are idempotent, so replaying a journal that was already
+        folded into the snapshot (crash during compaction) is harmless.
+        The partitions a record changes are marked to be written.
+        """
+        
+        self._dirty.add(META)  # the version at least
+        if 'type' in record:
+            self._dirty.add(record['type'])
+        # max(), so replaying records already folded into the snapshot never goes back
+        self.tasks['version'] = max(self.tasks['version'], record.get('version', self.tasks['version'] + 1))
+        op = record['op']
+        if op == 'add':
+            task = record['task']
+            if task.id not in self._ids:
+                # lists stay in id order; only moved tasks land before the end
+                insort(self.tasks[record['type']], task, key=lambda task: task.id)
+                self._index_task(task, record['type'])
+            self.tasks['latest_id'] = max(self.tasks['latest_id'], task.id)
+            self._add_tags(task.tags)
+        elif op == 'edit':
+            task = record['task']
+            old_task = self._find_task(task.id, record['type'])
+            if old_task:
+                self._unindex_task(old_task, record['type'])
+                old_task.update_from(task)  # in place, so the list position is kept
+                self._index_task(old_task, record['type'])
+                self._add_tags(task.tags)
+        elif op == 'delete':
+            task = self._find_task(record['id'], record['type'])
+            if task:
+                self._unindex_task(task, record['type'])
+                self.tasks[record['type']].remove(task)
+        elif op == 'archive':  # the tasks are in an archive segment already
+            self._dirty.add('overall')
+            for task_id in record['ids']:
+                task = self._find_task(task_id, 'overall')
+                if task:
+                    self._unindex_task(task, 'overall')
+                    self.tasks['overall'].remove(task)
+        elif op == 'finish':
+            task = self._find_task(record['id'], record['type'])
+            if task:
+                self._set_finished(task, record['type'], record['finished'],
+                                   parse_datetime(record['finished_at']))
+        elif op == 'reset_tasks':
+            for task in self.tasks[record['type']]:
+                self._ids.pop(task.id, None)
+                self._titles.pop((record['type'], task.title), None)
+                self._words.remove(task)
+                self._deadlines.remove(task)
+            for index in self._sorted[record['type']].values():
+                index.clear()
+            self._tagged[record['type']].clear()
+            if record['type'] == 'daily':
+                self._finished_daily.clear()
+            self.tasks[record['type']].clear()
+        elif op == 'reset_tags':
+            self.tasks["tags"].clear()
+            self._tag_names.clear()
+            for task_type in TASK_TYPES:
+                # only tagged tasks need touching
+                if self._tagged[task_type].ids_by_tag:
+                    self._dirty.add(task_type)
+                for ids in self._tagged[task_type].ids_by_tag.values():
+                    for task_id in ids:
+                        self._ids[task_id][1].tags.clear()
+                self._tagged[task_type].clear()
+        elif op == 'reset_daily':
+            self._dirty.add('daily')
+            for task_id in record['ids']:
+                task = self._find_task(task_id, 'daily')
+                if task:
+                    self._set_finished(task, 'daily', False, None)
+        
+        
+    def _build_indexes(self):
+        """Rebuilds the task indexes from the tasks."""
+        
+        self._ids = {}
+        self._titles = {}
+        for task_type in TASK_TYPES:
+            for task in self.tasks[task_type]:
+                self._ids[task.id] = (task_type, task)
+                self._titles.setdefault((task_type, task.title), set()).add(task.id)
+            for index in self._sorted[task_type].values():
+                index.rebuild(self.tasks[task_type])
+            self._tagged[task_type].rebuild(self.tasks[task_type])
+        self._tag_names = set(self.tasks['tags'])
+        self._words.rebuild(chain(*(self.tasks[task_type] for task_type in TASK_TYPES)))
+        self._deadlines.rebuild(chain(*(self.tasks[task_type] for task_type in TASK_TYPES)))
+        self._finished_daily.rebuild(self.tasks['daily'])
+        
+        
+    def _index_task(self, task: Task, task_type: str):
+        """Adds a task to the task indexes."""
+        
+        self._ids[task.id] = (task_type, task)
+        self._titles.setdefault((task_type, task.title), set()).add(task.id)
+        for index in self._sorted[task_type].values():
+            index.add(task)
+        self._tagged[task_type].add(task)
+        self._words.add(task)
+        self._deadlines.add(task)
+        if task_type == 'daily':
+            self._finished_daily.add(task)
+        
+        
+    def _unindex_task(self, task: Task, task_type: str):
+        """Removes a task from the task indexes."""
+        
+        self._ids.pop(task.id, None)
+        ids = self._titles.get((task_type, task.title))
+        if ids is not None:
+            ids.discard(task.id)
+            if not ids:  # the title is free once no task of the type has it
+                del self._titles[(task_type, task.title)]
+        for index in self._sorted[task_type].values():
+            index.remove(task)
+        self._tagged[task_type].remove(task)
+        self._words.remove(task)
+        self._deadlines.remove(task)
+        if task_type == 'daily':
+            self._finished_daily.remove(task)
+        
+        
+    def _set_finished(self, task: Task, task_type: str, finished: bool, finished_at: datetime | None):
+        """Sets the finished status of a task, updating only the indexes that depend on it."""
+        
+        self._sorted[task_type]['finished'].remove(task)
+        self._deadlines.remove(task)
+        if task_type == 'daily':
+            self._finished_daily.remove(task)
+        task.finished = finished
+        task.finished_at = finished_at
+        self._sorted[task_type]['finished'].add(task)
+        self._deadlines.add(task)
+        if task_type == 'daily':
+            self._finished_daily.add(task)
+        
+        
+    def _find_task(self, task_id: int, task_type: str):
+        """Returns the task with the given id if it belongs to the given type."""
+        
+        found = self._ids.get(task_id)
+        if found and found[0] == task_type:
+            return found[1]
+        return None
+    
+    
     def _increment_id(self):
-        """Returns the next available id."""
+        """Returns the next available id, reserved so no other process hands it out before it is flushed."""
+        
+        if self._reserved is None:
+            self._reserved = self._read_reserved()
+        self.tasks['latest_id'] = max(self.tasks['latest_id'], self._reserved) + 1
+        self._reserved = self.tasks['latest_id']
+        return self._reserved
+    
+    
+    def _read_reserved(self):
+        """Returns the highest id reserved in IDS_FILE, 0 if there is none."""
+        
+        try:
+            with open(self.IDS_FILE) as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return 0
+    
+    
+    def _save_reserved(self):
+        """Writes the ids reserved since the lock was taken to IDS_FILE, before the lock is released."""
         
-        self.tasks['latest_id'] += 1
-        return self.tasks['latest_id']
+        if self._reserved is not None:
+            with open(self.IDS_FILE, 'w') as f:
+                f.write(str(self._reserved))
+            self._reserved = None  # read again under the next hold; other processes may reserve meanwhile
     
     
     def _add_tags(self, new_tags: list):
         """Adds new tags to the list of tags."""
         
         for tag in new_tags:
-            if tag and tag not in self.tasks['tags']:
+            if tag and tag not in self._tag_names:
                 self.tasks['tags'].append(tag)
+                self._tag_names.add(tag)
+    
+    
+    # ==================================================================
+    # Storage maintenance
+    #                           Functions:
+    # transaction() -> Groups changes so they are persisted once, when the outermost block exits.
+    # flush() -> Writes every change that is not on disk yet.
+    # compact() -> Folds the journal into a fresh snapshot.
+    # _compact() -> Writes a fresh snapshot and drops the journal.
+    # ==================================================================
+    
+    @contextmanager
+    def transaction(self):
+        """Groups changes so they are persisted once, when the outermost block exits.
+
+        The exclusive store lock is held for the whole block, so other
+        processes cannot write in between, and changes queued by group commit
+        are flushed first if another process wrote meanwhile, so the block
+        sees its changes. Changes are applied in memory as
+        they happen; if the outermost block raises, they are undone and
+        nothing of it is persisted (archive segments already written stay,
+        holding copies of tasks the store still has).
+        """
+        
+        with self._lock.exclusive():
+            if self._depth == 0:
+                if self._pending and self._disk_state() != (self._snapshot_state, self._log_state):
+                    self.flush()
+                self._sync()
+                mark = len(self._pending)
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._depth == 1:
+                    self._undo(mark)
+                raise
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._save_reserved()
+            if self._depth == 0:
+                self._persist()
+    
+    
+    def flush(self):
+        """Writes every change that is not on disk yet."""
+        
+        with self._lock.exclusive():
+            self._flush_timer = None
+            records, self._pending = self._pending, []
+            if not records:
+                return
+            if self._disk_state() != (self._snapshot_state, self._log_state):
+                self._rebase(records)  # another process wrote since these were applied
+            if self.journal:
+                self._append_log(records)
+            else:
+                self._compact()
+            self._save_reserved()
+    
+    
+    def compact(self):
+        """Folds the journal into a fresh snapshot."""
+        
+        with self._lock.exclusive():
+            self.flush()
+            self._sync()
+            self._compact()
+    
+    
+    def _compact(self):
+        """Writes a fresh snapshot and drops the journal."""
+        
         self._update_json()
+        if os.path.exists(self.LOG_FILE):
+            os.remove(self.LOG_FILE)
+        self._log_state = None
+        self._log_records = 0
     
     
     # ==================================================================
     # Task Operations
     #                           Functions:
     # add_task() -> Adds a new task to the list of tasks.
-    # edit_task() -> Edits an existing task in the list of tasks.
+    # edit_task() -> Edits an existing task; returns False if there is none or its new title is taken.
     # delete_task() -> Deletes a task from the list of tasks.
     # toggle_task_finished() -> Toggles the finished status of a task.
     # ==================================================================
     
-    def add_task(self, new_task: dict, task_type: str):
+    @_writes
+    def add_task(self, new_task: Task, task_type: str):
         """Adds a new task to the list of tasks."""
         
         if not self.is_new_task_unique(new_task, task_type):
             return
 
         id = self._increment_id()
-        new_task['id'] = id
-        self.tasks[task_type].append(new_task)
-
-        self._add_tags(new_task['tags'])
-        self._update_json()
+        new_task.id = id
+        new_task.type = task_type
+        self._commit({'op': 'add', 'type': task_type, 'task': new_task})
 
 
-    def edit_task(self, edited_task: dict, task_type: str):
-        """Edits an existing task in the list of tasks."""
+    @_writes
+    def edit_task(self, edited_task: Task, task_type: str):
+        """Edits an existing task; returns False if there is none or its new title is taken."""
         
-        for i, task in enumerate(self.tasks[task_type]):
-            if task['id'] == edited_task['id']:
-                self.tasks[task_type][i] = edited_task
-                self._add_tags(edited_task['tags'])
-                self._update_json()
-                return
+        task = self._find_task(edited_task.id, task_type)
+        if not task or (edited_task.title != task.title and (task_type, edited_task.title) in self._titles):
+            return False
+        self._commit({'op': 'edit', 'type': task_type, 'task': edited_task})
+        return True
 
 
+    @_writes
     def delete_task(self, task_id: int, task_type: str):
         """Deletes a task from the list of tasks."""
         
-        for i, task in enumerate(self.tasks[task_type]):
-            if task['id'] == task_id:
-                del self.tasks[task_type][i]
-                self._update_json()
-                return
+        if self._find_task(task_id, task_type):
+            self._commit({'op': 'delete', 'type': task_type, 'id': task_id})
             
             
+    @_writes
     def toggle_task_finished(self, task_id: int, task_type: str):
         """Toggles the finished status of a task."""
         
-        for task in self.tasks[task_type]:
-            if task['id'] == task_id:
-                task['finished'] = not task['finished']
-                if task['finished']:
-                    task['finished_at'] = datetime.now().strftime("%Y-%m-%dT%H:%M")
-                else:
-                    task['finished_at'] = None
-                self._update_json()
-                return
+        task = self._find_task(task_id, task_type)
+        if task:
+            finished = not task.finished
+            finished_at = to_epoch(datetime.now()) if finished else None
+            self._commit({'op': 'finish', 'type': task_type, 'id': task_id,
+                          'finished': finished, 'finished_at': finished_at})
     
             
     # ==================================================================
@@ -124,116 +909,381 @@ class TaskJSON:
     #                           Functions:
     # reset_tasks() -> Resets all tasks of a given type (daily/overall) to empty list.
     # reset_tags() -> Resets all tags to empty list.
+    # reset_daily_finished() -> Resets all daily tasks that were finished before today.
     # ==================================================================
     
+    @_writes
     def reset_tasks(self, task_type: str):
         """Resets all tasks of a given type (daily/overall) to empty list."""
         
-        if task_type == 'daily':
-            self.tasks["daily"].clear()
-        elif task_type == 'overall':
-            self.tasks["overall"].clear()
-        self._update_json()
+        if task_type in TASK_TYPES:
+            self._commit({'op': 'reset_tasks', 'type': task_type})
 
 
+    @_writes
     def reset_tags(self):
         """Resets all tags to empty list."""
         
-        self.tasks["tags"].clear()
-        for task_type in ['daily', 'overall']:
-            for task in self.tasks[task_type]:
-                task['tags'].clear()
-        self._update_json()
+        if self.tasks['tags']:  # tasks only ever carry tags from this list
+            self._commit({'op': 'reset_tags'})
         
+    @_writes
     def reset_daily_finished(self):
-        """Resets all daily tasks that were finished before today."""
+        """Resets all daily tasks that were finished before today, in one journal record."""
+        
+        # the finish day index holds only finished tasks, so this visits no others
+        reset_ids = self._finished_daily.finished_before(datetime.now().date())
+        if reset_ids:
+            self._commit({'op': 'reset_daily', 'ids': reset_ids})
+
+
+    # ==================================================================
+    # Archive Operations
+    #                           Functions:
+    # archive_finished() -> Moves overall tasks finished long ago to the archive; returns how many.
+    # get_archived_count() -> Returns how many tasks are archived.
+    #
+    # Archived tasks leave the snapshot and indexes but stay reachable, read-only
+    # and with type ARCHIVE_TYPE, through get_task_by_id() and search_tasks(query, ARCHIVE_TYPE).
+    # ==================================================================
+    
+    @_writes
+    def archive_finished(self, older_than_days: float | None = None):
+        """Moves overall tasks finished more than older_than_days ago to the archive; returns how many."""
         
-        today = datetime.now().date()
-        tasks_reset = False  # Track if anything changed
+        days = self.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        cutoff = datetime.now() - timedelta(days=days)
+        tasks = [task for task in self.tasks['overall']
+                 if task.finished and task.finished_at and task.finished_at <= cutoff]
+        if not tasks:
+            return 0
+        self._archive.add_segment(tasks)  # durable before the tasks leave the store
+        self._commit({'op': 'archive', 'ids': [task.id for task in tasks]})
+        return len(tasks)
 
-        for task in self.tasks['daily']:
-            if task['finished'] and task.get('finished_at'):
-                finished_at = datetime.strptime(task['finished_at'], "%Y-%m-%dT%H:%M")
-                
-                # If task was finished on a previous day
-                if finished_at.date() < today:
-                    task['finished'] = False
-                    task['finished_at'] = None
-                    tasks_reset = True
 
-        if tasks_reset:
-            self._update_json()
+    @_reads
+    def get_archived_count(self):
+        """Returns how many tasks are archived."""
+        
+        return self._archive.count()
+
+
+    # ==================================================================
+    # Bulk Operations
+    #                           Functions:
+    # bulk_toggle() -> Toggles (or sets) the finished status of many tasks; returns how many changed.
+    # bulk_delete() -> Deletes many tasks; returns how many were deleted.
+    # bulk_retag() -> Adds and removes tags on many tasks; returns how many changed.
+    # bulk_move() -> Moves many tasks to another type; returns how many moved.
+    #
+    # Each runs as one transaction, so the changes are persisted together.
+    # ==================================================================
+    
+    @_writes
+    def bulk_toggle(self, task_ids: list, finished: bool | None = None):
+        """Toggles (or, given finished, sets) the finished status of many tasks; returns how many changed."""
+        
+        finished_at = to_epoch(datetime.now())
+        changed = 0
+        for task_id in dict.fromkeys(task_ids):
+            found = self._ids.get(task_id)
+            if not found:
+                continue
+            task_type, task = found
+            new_finished = not task.finished if finished is None else finished
+            if new_finished != task.finished:
+                self._commit({'op': 'finish', 'type': task_type, 'id': task_id,
+                              'finished': new_finished, 'finished_at': finished_at if new_finished else None})
+                changed += 1
+        return changed
+
+
+    @_writes
+    def bulk_delete(self, task_ids: list):
+        """Deletes many tasks; returns how many were deleted."""
+        
+        deleted = 0
+        for task_id in dict.fromkeys(task_ids):
+            found = self._ids.get(task_id)
+            if found:
+                self._commit({'op': 'delete', 'type': found[0], 'id': task_id})
+                deleted += 1
+        return deleted
+
+
+    @_writes
+    def bulk_retag(self, task_ids: list, add: list | None = None, remove: list | None = None):
+        """Adds and removes tags on many tasks; returns how many changed."""
+        
+        add = [tag for tag in (add or []) if tag]
+        remove = set(remove or [])
+        changed = 0
+        for task_id in dict.fromkeys(task_ids):
+            found = self._ids.get(task_id)
+            if not found:
+                continue
+            task_type, task = found
+            tags = list(dict.fromkeys([tag for tag in task.tags if tag not in remove] + add))
+            if tags != task.tags:
+                edited = Task.from_dict(task.to_dict())
+                edited.tags = tags
+                self._commit({'op': 'edit', 'type': task_type, 'task': edited})
+                changed += 1
+        return changed
+
+
+    @_writes
+    def bulk_move(self, task_ids: list, task_type: str):
+        """Moves many tasks to another type; returns how many moved.
+
+        Daily tasks have no deadline, so moving to daily clears it. Tasks whose
+        title is already taken in the other type stay where they are.
+        """
+        
+        if task_type not in TASK_TYPES:
+            return 0
+        moved = 0
+        for task_id in dict.fromkeys(task_ids):
+            found = self._ids.get(task_id)
+            if not found or found[0] == task_type or (task_type, found[1].title) in self._titles:
+                continue
+            task = Task.from_dict(found[1].to_dict())
+            task.type = task_type
+            if task_type == 'daily':
+                task.deadline = None
+            self._commit({'op': 'delete', 'type': found[0], 'id': task_id})
+            self._commit({'op': 'add', 'type': task_type, 'task': task})
+            moved += 1
+        return moved
 
 
     # ==================================================================
     # Getters/Checkers
     #                           Functions:
     # get_next_id() -> Returns the next available id.
+    # get_version() -> Returns the store version, which grows with every change.
     # get_tags() -> Returns the list of tags.
     # get_tasks_count() -> Returns the number of tasks of a given type.
     # get_tasks_by_type() -> Returns the list of tasks of a given type.
+    # get_tasks_page() -> Returns a sorted page of tasks of a given type and the total count.
+    # _get_tagged_page() -> Returns a sorted page of the tasks matching the tags, and their count.
     # get_task_by_id() -> Returns the task with the given id.
     # is_new_task_unique() -> Checks if the new task is unique.
+    # is_title_taken() -> Checks if a task of the given type has the title.
     # is_task_type_empty() -> Checks if the task type is empty.
     # does_task_exist() -> Checks if the task exists.
+    # search_tasks() -> Returns the tasks matching a text query, best match first.
+    # get_overdue_tasks() -> Returns the unfinished tasks whose deadline has passed, oldest first.
+    # get_tasks_due_within() -> Returns the unfinished tasks due in the next hours, soonest first.
+    # get_next_deadlines() -> Returns the next unfinished tasks due, soonest first.
+    # iter_tasks() -> Yields the tasks matching the filters in id order, a batch at a time.
+    # _tasks_after() -> Returns the next tasks of a type after an id, in id order.
     # ==================================================================
     
+    @_reads
     def get_next_id(self):
         """Returns the next available id."""
         
-        return self.tasks['latest_id'] + 1
+        return max(self.tasks['latest_id'], self._read_reserved()) + 1
 
 
+    @_reads
+    def get_version(self):
+        """Returns the store version, which grows with every change."""
+        
+        return self.tasks['version']
+
+
+    @_reads
     def get_tags(self):
         """Returns the list of tags."""
         
-        return self.tasks['tags']
+        return list(self.tasks['tags'])
 
 
+    @_reads
     def get_tasks_count(self, task_type: str):
         """Returns the number of tasks of a given type."""
         
         return len(self.tasks[task_type])
 
 
+    @_reads
     def get_tasks_by_type(self, task_type: str): 
         """Returns the list of tasks of a given type."""
         
         task_type = task_type.lower().strip()
-        if task_type in ['daily', 'overall']:
-            return self.tasks[task_type]
+        if task_type in TASK_TYPES:
+            return list(self.tasks[task_type])  # a copy, so writers can go on changing the list
+
+
+    @_reads
+    def get_tasks_page(self, task_type: str, sort_by: str = 'id', descending: bool = False,
+                       offset: int = 0, limit: int | None = None,
+                       tags: list | None = None, match_all: bool = True):
+        """Returns a sorted page of tasks of a given type and the total count.
+
+        With tags, only tasks carrying all of them (or any, if not match_all) are listed.
+        """
+        
+        task_type = task_type.lower().strip()
+        if task_type not in TASK_TYPES:
+            return [], 0
+        
+        tasks = self.tasks[task_type]
+        if tags:
+            return self._get_tagged_page(task_type, sort_by, descending, offset, limit, tags, match_all)
+        total = len(tasks)
+        if sort_by in SORT_KEYS:
+            ids = self._sorted[task_type][sort_by].ids(offset, limit, descending)
+            return [self._ids[task_id][1] for task_id in ids], total
+        
+        # 'id' order is insertion order, which the list already keeps
+        end = total if limit is None else min(offset + limit, total)
+        if descending:
+            return [tasks[total - 1 - i] for i in range(offset, end)], total
+        return tasks[offset:end], total
+
+
+    def _get_tagged_page(self, task_type: str, sort_by: str, descending: bool,
+                         offset: int, limit: int | None, tags: list, match_all: bool):
+        """Returns a sorted page of the tasks of a given type matching the tags, and their count."""
+        
+        matches = self._tagged[task_type].ids(tags, match_all)
+        total = len(matches)
+        if total * 8 < len(self.tasks[task_type]):
+            # selective filter: sorting the matches beats walking the whole index
+            key_func = SORT_KEYS.get(sort_by)
+            page = sorted((self._ids[task_id][1] for task_id in matches),
+                          key=(lambda task: (key_func(task), task.id)) if key_func else (lambda task: task.id),
+                          reverse=descending)
+            end = total if limit is None else offset + limit
+            return page[offset:end], total
+        
+        if sort_by in SORT_KEYS:
+            ids = self._sorted[task_type][sort_by].filtered_ids(matches, offset, limit, descending)
+        else:
+            tasks = self.tasks[task_type]
+            ordered = (task.id for task in (reversed(tasks) if descending else tasks))
+            ids = slice_ids(ordered, matches, offset, limit)
+        return [self._ids[task_id][1] for task_id in ids], total
 
 
+    @_reads
     def get_task_by_id(self, task_id: int):
-        """Returns the task with the given id."""
+        """Returns the task with the given id (archived tasks come with ARCHIVE_TYPE)."""
         
-        for task_type in ['daily', 'overall']:
-            for task in self.tasks[task_type]:
-                if task['id'] == task_id:
-                    return task, task_type
-        return None
+        found = self._ids.get(task_id)
+        if found:
+            task_type, task = found
+            return task, task_type
+        task = self._archive.get(task_id)
+        return (task, ARCHIVE_TYPE) if task else None
 
 
-    def is_new_task_unique(self, new_task: dict, task_type: str):
+    @_reads
+    def is_new_task_unique(self, new_task: Task, task_type: str):
         """Checks if a new task is unique (title or id)."""
         
-        for task in self.tasks[task_type]:
-            if task['title'] == new_task['title'] or task['id'] == new_task['id']:
-                return False
-        return True
+        if (task_type, new_task.title) in self._titles:
+            return False
+        return self._find_task(new_task.id, task_type) is None
     
     
+    @_reads
+    def is_title_taken(self, task_type: str, title: str):
+        """Checks if a task of the given type has the title."""
+        
+        return (task_type, title) in self._titles
+    
+    
+    @_reads
     def is_task_type_empty(self, task_type: str):
         """Checks if a task type is empty."""
         
         return len(self.tasks[task_type]) == 0
     
     
+    @_reads
     def does_task_exist(self, task_id: int):
-        """Checks if a task with the given id exists."""
+        """Checks if a task with the given id exists (archived ones too, like get_task_by_id())."""
         
-        for task_type in ['daily', 'overall']:
-            for task in self.tasks[task_type]:
-                if task['id'] == task_id:
-                    return True
-        return False
\ No newline at end of file
+        return task_id in self._ids or self._archive.contains(task_id)
+
+
+    @_reads
+    def search_tasks(self, query: str, task_type: str | None = None, limit: int | None = 50):
+        """Returns the tasks matching a text query, best match first.
+
+        Every query word must match a title or description word, or be a prefix of one;
+        a lazy store matches titles only. Archived tasks are searched only when
+        task_type is ARCHIVE_TYPE, as that reads every archive segment.
+        """
+        
+        if task_type == ARCHIVE_TYPE:
+            return self._archive.search(query, limit)
+        results = []
+        for task_id, _ in self._words.search(query):
+            found_type, task = self._ids[task_id]
+            if task_type and found_type != task_type:
+                continue
+            results.append(task)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+    @_reads
+    def get_overdue_tasks(self, now: datetime | None = None, limit: int | None = None):
+        """Returns the unfinished tasks whose deadline has passed, oldest first."""
+        
+        ids = self._deadlines.overdue(now or datetime.now(), limit)
+        return [self._ids[task_id][1] for task_id in ids]
+    
+    
+    @_reads
+    def get_tasks_due_within(self, hours: float, now: datetime | None = None, limit: int | None = None):
+        """Returns the unfinished tasks due in the next hours, soonest first."""
+        
+        ids = self._deadlines.due_within(now or datetime.now(), timedelta(hours=hours), limit)
+        return [self._ids[task_id][1] for task_id in ids]
+    
+    
+    @_reads
+    def get_next_deadlines(self, count: int, now: datetime | None = None):
+        """Returns the next unfinished tasks due, soonest first."""
+        
+        ids = self._deadlines.upcoming(now or datetime.now(), count)
+        return [self._ids[task_id][1] for task_id in ids]
+    
+    
+    def iter_tasks(self, task_type: str | None = None, tags: list | None = None,
+                   finished: bool | None = None, batch_size: int = 1000):
+        """Yields the tasks matching the filters in id order, a batch at a time.
+
+        Filters: one type, carrying all the tags, finished or not. Each batch
+        is read under the store lock on its own, so a long export does not
+        hold up writers.
+        """
+        
+        wanted = set(tags or [])
+        for current_type in [task_type] if task_type else TASK_TYPES:
+            after_id = 0
+            while True:
+                batch = self._tasks_after(current_type, after_id, batch_size)
+                if not batch:
+                    break
+                after_id = batch[-1].id
+                for task in batch:
+                    if (finished is None or task.finished == finished) and wanted.issubset(task.tags):
+                        yield task
+    
+    
+    @_reads
+    def _tasks_after(self, task_type: str, after_id: int, limit: int):
+        """Returns the next tasks of a type after an id, in id order."""
+        
+        tasks = self.tasks[task_type]
+        start = bisect_right(tasks, after_id, key=lambda task: task.id)
+        return tasks[start:start + limit]
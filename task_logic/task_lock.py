@@ -0,0 +1,135 @@
+#                            TASK STORE LOCKS (v1.0.0)
+
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks (Windows): the store assumes a single process
+    fcntl = None
+
+class RWLock:
+    """Reader/writer lock for the threads of a process.
+
+    Any number of threads may hold it shared, or one thread exclusively;
+    waiting writers go first so readers cannot starve them. Re-entrant: a
+    thread's nested holds only count, and a thread holding it exclusively may
+    take shared holds too. Upgrading a shared hold raises RuntimeError.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0          # threads holding the lock shared
+        self._writer = None        # thread holding the lock exclusively
+        self._writers_waiting = 0
+        self._local = threading.local()  # per-thread nesting depth
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # shared() -> Holds the lock for reading.
+    # exclusive() -> Holds the lock for writing.
+    # _acquire() -> Takes the lock, or nests into the hold the thread already has.
+    # _release() -> Drops one hold, unlocking after the thread's outermost one.
+    # _held() -> Called when the lock gets held, before anything runs under it.
+    # _freed() -> Called when the last holder releases the lock.
+    # ==================================================================
+
+    @contextmanager
+    def shared(self):
+        """Holds the lock for reading."""
+
+        self._acquire(exclusive=False)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+    @contextmanager
+    def exclusive(self):
+        """Holds the lock for writing."""
+
+        self._acquire(exclusive=True)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+    def _acquire(self, exclusive: bool):
+        """Takes the lock, or nests into the hold the thread already has."""
+
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            if exclusive and self._writer != threading.get_ident():
+                raise RuntimeError("cannot upgrade a shared hold to an exclusive one")
+            self._local.depth = depth + 1
+            return
+
+        with self._cond:
+            if exclusive:
+                self._writers_waiting += 1
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+                self._writers_waiting -= 1
+                self._writer = threading.get_ident()
+                self._held(exclusive=True)
+            else:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+                if self._readers == 1:
+                    self._held(exclusive=False)
+        self._local.depth = 1
+
+
+    def _release(self):
+        """Drops one hold, unlocking after the thread's outermost one."""
+
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+
+        with self._cond:
+            if self._writer == threading.get_ident():
+                self._writer = None
+                self._freed()
+            else:
+                self._readers -= 1
+                if not self._readers:
+                    self._freed()
+            self._cond.notify_all()
+
+
+    def _held(self, exclusive: bool):
+        """Called when the lock gets held, before anything runs under it."""
+
+
+    def _freed(self):
+        """Called when the last holder releases the lock."""
+
+
+class FileLock(RWLock):
+    """RWLock that also holds an advisory lock on a file shared by every process using the store."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._file = None
+
+    def _held(self, exclusive: bool):
+        """Locks the file, shared or exclusively like the threads."""
+
+        if fcntl is not None:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+    def _freed(self):
+        """Unlocks the file."""
+
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
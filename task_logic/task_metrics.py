@@ -0,0 +1,251 @@
+#                            TASK METRICS (v1.0.0)
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# Set TASK_METRICS=1 to collect metrics. Off, every metric call returns at
+# once and store methods are not even wrapped.
+METRICS_ENABLED = os.environ.get('TASK_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+
+# Histogram bucket bounds, in seconds: store operations take microseconds, pages milliseconds.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    """Returns a label value escaped for the Prometheus text format."""
+
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = '') -> str:
+    """Returns the {name="value",...} part of a sample line (empty without labels)."""
+
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    """A named metric with a value per combination of label values."""
+
+    TYPE = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}  # label values -> value
+        self._lock = threading.Lock()  # requests are served on several threads
+
+
+    def render(self):
+        """Returns the metric in the Prometheus text format, one line per list item."""
+
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.TYPE}']
+        for label_values, value in sorted(self._snapshot().items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+    def _snapshot(self):
+        """Returns a copy of the values, taken under the lock."""
+
+        with self._lock:
+            return dict(self._values)
+
+
+class Counter(Metric):
+    """Metric that only goes up: calls, bytes written."""
+
+    TYPE = 'counter'
+
+    def inc(self, *label_values, amount: float = 1):
+        """Adds amount to the counter of the given label values."""
+
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    """Metric read when scraped, from a callback returning {label values: value}."""
+
+    TYPE = 'gauge'
+
+    def __init__(self, name: str, help: str, labels: tuple = (), callback=None):
+        super().__init__(name, help, labels)
+        self.callback = callback
+
+
+    def _snapshot(self):
+        """Returns the values the callback reports now."""
+
+        return self.callback() if self.callback else {}
+
+
+class Histogram(Metric):
+    """Metric counting observations (durations) into cumulative buckets."""
+
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+
+    def observe(self, value: float, *label_values):
+        """Counts a value in the histogram of the given label values."""
+
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # [count per bucket (the last one is +Inf), sum, count]
+                series = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+
+    def time(self, *label_values):
+        """Context manager observing how long its block takes."""
+
+        if not METRICS_ENABLED:
+            return nullcontext()
+        return self._timer(label_values)
+
+
+    @contextmanager
+    def _timer(self, label_values: tuple):
+        """Observes how long the block of the with statement takes."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+
+    def render(self):
+        """Returns the buckets, sum and count of each series in the Prometheus text format."""
+
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.TYPE}']
+        with self._lock:
+            values = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._values.items()}
+        for label_values, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    """The metrics served at /metrics."""
+
+    def __init__(self):
+        self.metrics = []
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # counter() -> Registers and returns a counter.
+    # gauge() -> Registers and returns a gauge read from a callback.
+    # histogram() -> Registers and returns a histogram.
+    # render() -> Returns every metric in the Prometheus text format.
+    # _register() -> Adds a metric to the ones served.
+    # ==================================================================
+
+    def counter(self, name: str, help: str, labels: tuple = ()):
+        """Registers and returns a counter."""
+
+        return self._register(Counter(name, help, labels))
+
+
+    def gauge(self, name: str, help: str, labels: tuple = (), callback=None):
+        """Registers and returns a gauge read from a callback."""
+
+        return self._register(Gauge(name, help, labels, callback))
+
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        """Registers and returns a histogram."""
+
+        return self._register(Histogram(name, help, labels, buckets))
+
+
+    def render(self):
+        """Returns every metric in the Prometheus text format."""
+
+        return '\n'.join(line for metric in self.metrics for line in metric.render()) + '\n'
+
+
+    def _register(self, metric: Metric):
+        """Adds a metric to the ones served."""
+
+        self.metrics.append(metric)
+        return metric
+
+
+registry = Registry()
+
+STORE_OPERATIONS = registry.counter(
+    'task_store_operations_total', 'Calls of each store operation.', ('operation',))
+STORE_OPERATION_SECONDS = registry.histogram(
+    'task_store_operation_seconds', 'Time spent in each store operation, locking included.', ('operation',))
+SNAPSHOT_WRITE_SECONDS = registry.histogram(
+    'task_store_snapshot_write_seconds', 'Time spent writing the snapshot (_update_json).')
+BYTES_WRITTEN = registry.counter(
+    'task_store_written_bytes_total', 'Bytes written to the store files.', ('file',))
+HTTP_REQUESTS = registry.counter(
+    'task_http_requests_total', 'Requests served, by route, method and status.', ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'task_http_request_seconds', 'Time spent serving requests, by route.', ('route', 'method'))
+TEMPLATE_RENDER_SECONDS = registry.histogram(
+    'task_template_render_seconds', 'Time spent rendering templates.', ('template',))
+
+# ==================================================================
+# Instrumentation
+#                           Functions:
+# instrumented() -> Counts and times the calls of a store method.
+# watch_store() -> Registers the size gauges of a store.
+# ==================================================================
+
+def instrumented(method):
+    """Counts and times the calls of a store method; returns it unchanged when metrics are off."""
+
+    if not METRICS_ENABLED:
+        return method
+    operation = method.__name__
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            STORE_OPERATIONS.inc(operation)
+            STORE_OPERATION_SECONDS.observe(time.perf_counter() - start, operation)
+    return wrapper
+
+
+def watch_store(store):
+    """Registers the size gauges of a store, read when /metrics is scraped."""
+
+    registry.gauge('task_store_tasks', 'Tasks in the store, by type.', ('type',),
+                   lambda: {(task_type,): store.get_tasks_count(task_type) for task_type in ['daily', 'overall']})
+    registry.gauge('task_store_tags', 'Tags in the store.',
+                   callback=lambda: {(): len(store.get_tags())})
+    registry.gauge('task_store_version', 'Changes made to the store so far.',
+                   callback=lambda: {(): store.get_version()})
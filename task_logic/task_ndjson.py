@@ -0,0 +1,110 @@
+#                            TASK NDJSON IMPORT/EXPORT (v1.0.0)
+
+import json
+from collections.abc import Iterable, Iterator
+
+from task_logic.task import Task
+from task_logic.task_storage import TaskStorage
+
+IMPORT_BATCH_SIZE = 1000  # tasks added per store transaction
+MAX_REPORTED_ERRORS = 20  # invalid lines listed in an import report (all are counted)
+
+# Fields an imported line may leave out, and what they default to.
+OPTIONAL_FIELDS = {
+    'id': 0,
+    'description': '',
+    'tags': [],
+    'deadline': None,
+    'created_at': None,
+    'finished': False,
+    'finished_at': None,
+}
+
+# ==================================================================
+# Export/Import
+#                           Functions:
+# export_ndjson() -> Yields the matching tasks as NDJSON lines, one task per line.
+# import_ndjson() -> Adds the tasks of NDJSON lines to a store, a batch per transaction.
+# _add_batch() -> Adds a batch of tasks in one transaction, counting what was added and skipped.
+# parse_task_line() -> Returns the task of an NDJSON line, or raises ValueError.
+# ==================================================================
+
+def export_ndjson(store: TaskStorage, task_type: str | None = None, tags: list | None = None,
+                  finished: bool | None = None) -> Iterator[str]:
+    """Yields the matching tasks as NDJSON lines, one task per line.
+
+    Tasks are read from the store a batch at a time, so memory stays flat
+    however many tasks there are.
+    """
+
+    for task in store.iter_tasks(task_type, tags, finished):
+        yield json.dumps(task.to_dict(), ensure_ascii=False) + '\n'
+
+
+def import_ndjson(store: TaskStorage, lines: Iterable, batch_size: int = IMPORT_BATCH_SIZE):
+    """Adds the tasks of NDJSON lines to a store, a batch per transaction.
+
+    Tasks get new ids and, as with add_task(), a task whose title is taken in
+    its type is skipped. Invalid lines are counted and the first ones reported.
+    Returns {'imported', 'skipped', 'invalid', 'errors'}.
+    """
+
+    report = {'imported': 0, 'skipped': 0, 'invalid': 0, 'errors': []}
+    batch = []
+    for line_number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            batch.append(parse_task_line(line))
+        except ValueError as e:
+            report['invalid'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append(f"line {line_number}: {e}")
+        if len(batch) >= batch_size:
+            _add_batch(store, batch, report)
+            batch = []
+    _add_batch(store, batch, report)
+    return report
+
+
+def _add_batch(store: TaskStorage, batch: list, report: dict):
+    """Adds a batch of tasks in one transaction, counting what was added and skipped."""
+
+    if not batch:
+        return
+    with store.transaction():
+        for task in batch:
+            task.id = 0
+            store.add_task(task, task.type)
+            report['imported' if task.id else 'skipped'] += 1
+
+
+def parse_task_line(line: str):
+    """Returns the task of an NDJSON line, or raises ValueError."""
+
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise ValueError("not valid JSON") from None
+    if not isinstance(data, dict):
+        raise ValueError("not a JSON object")
+    if data.get('type') not in ['daily', 'overall']:
+        raise ValueError("type must be 'daily' or 'overall'")
+    if not isinstance(data.get('title'), str) or not data['title'].strip():
+        raise ValueError("title must be a non-empty string")
+    data = {**OPTIONAL_FIELDS, **data}
+    if not isinstance(data['description'], str):
+        raise ValueError("description must be a string")
+    if not isinstance(data['tags'], list) or not all(isinstance(tag, str) for tag in data['tags']):
+        raise ValueError("tags must be a list of strings")
+    if not isinstance(data['finished'], bool):
+        raise ValueError("finished must be true or false")
+    for field in ('deadline', 'created_at', 'finished_at'):
+        if data[field] is not None and not isinstance(data[field], str):
+            raise ValueError(f"{field} must be an ISO 8601 date and time")
+    try:
+        return Task.from_dict(data)
+    except ValueError:
+        raise ValueError("dates must be ISO 8601 dates and times") from None
@@ -0,0 +1,92 @@
+#                            TASK DAILY ROLLOVER (v1.0.0)
+
+import threading
+from datetime import date, datetime, timedelta
+
+ROLLOVER_DELAY = 1.0  # seconds past midnight the timer fires, so the clock already reads the new day
+
+class DailyRollover:
+    """Resets the daily tasks finished on earlier days, once a day, for a process that keeps running.
+
+    A timer thread rolls over just after local midnight, and check() can be
+    called on every request in case the timer is late (a suspended machine,
+    a clock set forward). Either runs the store's reset_daily_finished()
+    once a day; after that, check() only compares two dates.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._day = None  # day the rollover last ran
+        self._timer = None
+        self._running = False
+        self._lock = threading.Lock()  # one rollover at a time; requests are served on several threads
+
+    # ==================================================================
+    # Operations
+    #                           Functions:
+    # start() -> Rolls over now, then at every local midnight until stop(); later calls do nothing.
+    # stop() -> Cancels the scheduled rollover.
+    # check() -> Rolls over if it has not run today; returns whether it did.
+    # _schedule() -> Starts the timer for the next local midnight.
+    # _on_midnight() -> Rolls over and schedules the next midnight.
+    # ==================================================================
+
+    def start(self):
+        """Rolls over now, then at every local midnight until stop(); later calls do nothing."""
+
+        if self._running:
+            return
+        with self._lock:
+            if self._running:  # another thread started it meanwhile
+                return
+            self._running = True
+        self.check()
+        self._schedule()
+
+
+    def stop(self):
+        """Cancels the scheduled rollover."""
+
+        with self._lock:
+            self._running = False
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+
+    def check(self):
+        """Rolls over if it has not run today; returns whether it did."""
+
+        today = date.today()
+        if self._day == today:
+            return False
+        with self._lock:
+            if self._day == today:  # another thread rolled over meanwhile
+                return False
+            self.store.reset_daily_finished()
+            self._day = today
+        return True
+
+
+    def _schedule(self):
+        """Starts the timer for the next local midnight."""
+
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        # through timestamps, so a DST change before midnight does not shift the timer
+        delay = midnight.timestamp() - now.timestamp() + ROLLOVER_DELAY
+        with self._lock:
+            if not self._running:
+                return
+            self._timer = threading.Timer(delay, self._on_midnight)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+    def _on_midnight(self):
+        """Rolls over and schedules the next midnight; a timer firing early only reschedules."""
+
+        try:
+            self.check()
+        finally:
+            self._schedule()
@@ -0,0 +1,689 @@
+#                            TASK MANAGER SQLITE DATABASE (v1.0.0)
+
+import atexit
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+
+from task_logic.task import Task, format_datetime
+from task_logic.task_index import TITLE_WEIGHT, tokenize
+from task_logic.task_storage import DURABILITY_LEVELS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    deadline TEXT,
+    created_at TEXT NOT NULL,
+    finished INTEGER NOT NULL DEFAULT 0,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_type_title ON tasks(type, title);
+CREATE INDEX IF NOT EXISTS idx_tasks_type_deadline ON tasks(type, deadline);
+CREATE INDEX IF NOT EXISTS idx_tasks_type_finished ON tasks(type, finished);
+CREATE INDEX IF NOT EXISTS idx_tasks_type_created_at ON tasks(type, created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_type_title_nocase ON tasks(type, title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_tasks_open_deadline ON tasks(deadline, id)
+    WHERE finished = 0 AND deadline IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_tasks_daily_finished_at ON tasks(finished_at)
+    WHERE type = 'daily' AND finished = 1;
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS task_tags (
+    task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (task_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags(tag_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS task_search USING fts5(title, description);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('latest_id', 0);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+TASK_COLUMNS = "id, type, title, description, deadline, created_at, finished, finished_at"
+
+# ORDER BY terms for the sort keys of get_tasks_page() (see task_index.SORT_KEYS).
+SORT_COLUMNS = {
+    'id': ["id"],
+    'deadline': ["deadline IS NULL", "deadline", "id"],
+    'created_at': ["created_at", "id"],
+    'title': ["title COLLATE NOCASE", "id"],
+    'finished': ["finished", "id"],
+}
+
+# PRAGMA synchronous for each durability level. In WAL mode NORMAL syncs only at
+# checkpoints, the nearest SQLite has to fsyncing periodically.
+SYNCHRONOUS = {'none': 'OFF', 'commit': 'FULL', 'periodic': 'NORMAL'}
+
+def _locked(method):
+    """Runs a getter holding the connection lock."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class TaskSQLite:
+    DBFILE = './task_data/data.db'
+    GROUP_COMMIT_INTERVAL = None  # seconds between commits; None commits after every change
+    DURABILITY = 'none'  # when commits are fsynced: 'none', 'commit' or 'periodic'
+
+    def __init__(self, db_file: str | None = None, group_commit_interval: float | None = None,
+                 durability: str | None = None):
+        self.conn = sqlite3.connect(db_file or self.DBFILE, check_same_thread=False)
+        self.group_commit_interval = group_commit_interval or self.GROUP_COMMIT_INTERVAL
+        self.durability = durability or self.DURABILITY
+        if self.durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {self.durability}")
+        self._depth = 0  # nesting level of transaction()
+        self._lock = threading.RLock()  # one thread at a time on the shared connection
+        self._commit_timer = None
+        self._setup_db()
+        if self.group_commit_interval:
+            atexit.register(self.flush)
+
+    # ==================================================================
+    # Internal helpers (database + rows)
+    #                           Functions:
+    # _setup_db() -> Creates the tables and indexes if they don't exist.
+    # _row_to_task() -> Returns a task object from a tasks row.
+    # _rows_to_tasks() -> Returns task objects (with tags) from tasks rows.
+    # _insert_task() -> Inserts a task row, its tags and its search entry.
+    # _set_task_tags() -> Replaces the tags of a task.
+    # _increment_id() -> Returns the next available id.
+    # _persist() -> Commits now, or schedules a commit in group commit mode.
+    # ==================================================================
+
+    def _setup_db(self):
+        """Creates the tables and indexes if they don't exist."""
+
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.durability]}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            # databases created before the search table existed
+            if (self.conn.execute("SELECT 1 FROM task_search LIMIT 1").fetchone() is None
+                    and self.conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is not None):
+                self.conn.execute("INSERT INTO task_search (rowid, title, description) "
+                                  "SELECT id, title, description FROM tasks")
+
+
+    def _row_to_task(self, row: tuple, tags: list):
+        """Returns a task object from a tasks row."""
+
+        return Task(
+            type=row[1],
+            id=row[0],
+            title=row[2],
+            description=row[3],
+            tags=tags,
+            deadline=row[4],
+            created_at=row[5],
+            finished=bool(row[6]),
+            finished_at=row[7]
+        )
+
+
+    def _rows_to_tasks(self, rows: list):
+        """Returns task objects (with tags) from tasks rows."""
+
+        tags = {row[0]: [] for row in rows}
+        if tags:
+            placeholders = ",".join("?" * len(tags))
+            for task_id, name in self.conn.execute(
+                    f"SELECT tt.task_id, t.name FROM task_tags tt JOIN tags t ON t.id = tt.tag_id "
+                    f"WHERE tt.task_id IN ({placeholders}) ORDER BY tt.task_id, tt.position",
+                    list(tags)):
+                tags[task_id].append(name)
+        return [self._row_to_task(row, tags[row[0]]) for row in rows]
+
+
+    def _insert_task(self, task: Task, task_type: str):
+        """Inserts a task row, its tags and its search entry."""
+
+        self.conn.execute(
+            f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (task.id, task_type, task.title, task.description, format_datetime(task.deadline),
+             format_datetime(task.created_at), int(task.finished), format_datetime(task.finished_at)))
+        self.conn.execute("INSERT INTO task_search (rowid, title, description) VALUES (?, ?, ?)",
+                          (task.id, task.title, task.description))
+        self._set_task_tags(task.id, task.tags)
+
+
+    def _set_task_tags(self, task_id: int, tags: list):
+        """Replaces the tags of a task."""
+
+        self.conn.execute("DELETE FROM task_tags WHERE task_id = ?", (task_id,))
+        for position, tag in enumerate(tag for tag in tags if tag):
+            self.conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag,))
+            self.conn.execute(
+                "INSERT OR IGNORE INTO task_tags (task_id, tag_id, position) "
+                "SELECT ?, id, ? FROM tags WHERE name = ?", (task_id, position, tag))
+
+
+    def _increment_id(self):
+        """Returns the next available id."""
+
+        self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'latest_id'")
+        return self.get_next_id() - 1
+
+
+    def _persist(self):
+        """Commits now, or schedules a commit in group commit mode."""
+
+        if not self.group_commit_interval:
+            self.flush()
+        elif self._commit_timer is None:
+            self._commit_timer = threading.Timer(self.group_commit_interval, self.flush)
+            self._commit_timer.daemon = True
+            self._commit_timer.start()
+
+
+    # ==================================================================
+    # Storage maintenance
+    #                           Functions:
+    # transaction() -> Groups changes so they are committed once, when the outermost block exits.
+    # flush() -> Commits every change that is not committed yet.
+    # ==================================================================
+
+    @contextmanager
+    def transaction(self):
+        """Groups changes so they are committed once, when the outermost block exits.
+
+        An error inside the outermost block rolls back that block only: in
+        group commit mode, blocks that finished earlier stay pending, as their
+        callers were told they succeeded. Other threads wait for the block to
+        exit. A block that changed anything bumps the store version.
+        """
+
+        with self._lock:
+            if self._depth == 0:
+                changes = self.conn.total_changes
+                began = not self.conn.in_transaction
+                if began:
+                    self.conn.execute("BEGIN")  # so releasing the savepoint does not commit
+                self.conn.execute("SAVEPOINT task_block")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                if self._depth == 1:
+                    if began:  # nothing else pending: end the transaction, or the write lock stays held
+                        self.conn.rollback()
+                    else:
+                        self.conn.execute("ROLLBACK TO task_block")
+                        self.conn.execute("RELEASE task_block")
+                raise
+            finally:
+                self._depth -= 1
+            if self._depth == 0:
+                self.conn.execute("RELEASE task_block")
+                if self.conn.total_changes != changes:
+                    self.conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                self._persist()
+
+
+    def flush(self):
+        """Commits every change that is not committed yet."""
+
+        with self._lock:
+            self._commit_timer = None
+            self.conn.commit()
+
+
+    # ==================================================================
+    # Task Operations
+    #                           Functions:
+    # add_task() -> Adds a new task to the list of tasks.
+    # edit_task() -> Edits an existing task; returns False if there is none or its new title is taken.
+    # delete_task() -> Deletes a task from the list of tasks.
+    # toggle_task_finished() -> Toggles the finished status of a task.
+    # ==================================================================
+
+    def add_task(self, new_task: Task, task_type: str):
+        """Adds a new task to the list of tasks."""
+
+        with self.transaction():
+            if not self.is_new_task_unique(new_task, task_type):
+                return
+            new_task.id = self._increment_id()
+            new_task.type = task_type
+            self._insert_task(new_task, task_type)
+
+
+    def edit_task(self, edited_task: Task, task_type: str):
+        """Edits an existing task; returns False if there is none or its new title is taken."""
+
+        with self.transaction():
+            row = self.conn.execute("SELECT title FROM tasks WHERE id = ? AND type = ?",
+                                    (edited_task.id, task_type)).fetchone()
+            if not row or (edited_task.title != row[0] and self.is_title_taken(task_type, edited_task.title)):
+                return False
+            self.conn.execute(
+                "UPDATE tasks SET title = ?, description = ?, deadline = ?, created_at = ?, "
+                "finished = ?, finished_at = ? WHERE id = ? AND type = ?",
+                (edited_task.title, edited_task.description, format_datetime(edited_task.deadline),
+                 format_datetime(edited_task.created_at), int(edited_task.finished),
+                 format_datetime(edited_task.finished_at), edited_task.id, task_type))
+            self.conn.execute("UPDATE task_search SET title = ?, description = ? WHERE rowid = ?",
+                              (edited_task.title, edited_task.description, edited_task.id))
+            self._set_task_tags(edited_task.id, edited_task.tags)
+            return True
+
+
+    def delete_task(self, task_id: int, task_type: str):
+        """Deletes a task from the list of tasks."""
+
+        with self.transaction():
+            cursor = self.conn.execute("DELETE FROM tasks WHERE id = ? AND type = ?", (task_id, task_type))
+            if cursor.rowcount:
+                self.conn.execute("DELETE FROM task_search WHERE rowid = ?", (task_id,))
+
+
+    def toggle_task_finished(self, task_id: int, task_type: str):
+        """Toggles the finished status of a task."""
+
+        now = format_datetime(datetime.now())
+        with self.transaction():
+            self.conn.execute(
+                "UPDATE tasks SET finished = NOT finished, "
+                "finished_at = CASE WHEN finished THEN NULL ELSE ? END "
+                "WHERE id = ? AND type = ?", (now, task_id, task_type))
+
+
+    # ==================================================================
+    # Reset Operations
+    #                           Functions:
+    # reset_tasks() -> Resets all tasks of a given type (daily/overall) to empty list.
+    # reset_tags() -> Resets all tags to empty list.
+    # reset_daily_finished() -> Resets all daily tasks that were finished before today.
+    # ==================================================================
+
+    def reset_tasks(self, task_type: str):
+        """Resets all tasks of a given type (daily/overall) to empty list."""
+
+        with self.transaction():
+            self.conn.execute("DELETE FROM task_search WHERE rowid IN (SELECT id FROM tasks WHERE type = ?)",
+                              (task_type,))
+            self.conn.execute("DELETE FROM tasks WHERE type = ?", (task_type,))
+
+
+    def reset_tags(self):
+        """Resets all tags to empty list."""
+
+        with self.transaction():
+            self.conn.execute("DELETE FROM task_tags")
+            self.conn.execute("DELETE FROM tags")
+
+
+    def reset_daily_finished(self):
+        """Resets all daily tasks that were finished before today."""
+
+        today = format_datetime(datetime.now().replace(hour=0, minute=0))
+        with self.transaction():
+            # named, as without ANALYZE statistics the planner prefers idx_tasks_type_finished
+            self.conn.execute(
+                "UPDATE tasks INDEXED BY idx_tasks_daily_finished_at SET finished = 0, finished_at = NULL "
+                "WHERE type = 'daily' AND finished = 1 AND finished_at < ?", (today,))
+
+
+    # ==================================================================
+    # Bulk Operations
+    #                           Functions:
+    # bulk_toggle() -> Toggles (or sets) the finished status of many tasks; returns how many changed.
+    # bulk_delete() -> Deletes many tasks; returns how many were deleted.
+    # bulk_retag() -> Adds and removes tags on many tasks; returns how many changed.
+    # bulk_move() -> Moves many tasks to another type; returns how many moved.
+    #
+    # Each runs as one transaction, so the changes are committed together.
+    # ==================================================================
+
+    def bulk_toggle(self, task_ids: list, finished: bool | None = None):
+        """Toggles (or, given finished, sets) the finished status of many tasks; returns how many changed."""
+
+        ids = list(dict.fromkeys(task_ids))
+        placeholders = ",".join("?" * len(ids))
+        now = format_datetime(datetime.now())
+        with self.transaction():
+            if finished is None:
+                cursor = self.conn.execute(
+                    "UPDATE tasks SET finished = NOT finished, "
+                    "finished_at = CASE WHEN finished THEN NULL ELSE ? END "
+                    f"WHERE id IN ({placeholders})", [now, *ids])
+            else:
+                cursor = self.conn.execute(
+                    f"UPDATE tasks SET finished = ?, finished_at = ? WHERE id IN ({placeholders}) AND finished != ?",
+                    [int(finished), now if finished else None, *ids, int(finished)])
+        return cursor.rowcount
+
+
+    def bulk_delete(self, task_ids: list):
+        """Deletes many tasks; returns how many were deleted."""
+
+        ids = list(dict.fromkeys(task_ids))
+        placeholders = ",".join("?" * len(ids))
+        with self.transaction():
+            cursor = self.conn.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", ids)
+            self.conn.execute(f"DELETE FROM task_search WHERE rowid IN ({placeholders})", ids)
+        return cursor.rowcount
+
+
+    def bulk_retag(self, task_ids: list, add: list | None = None, remove: list | None = None):
+        """Adds and removes tags on many tasks; returns how many changed."""
+
+        ids = list(dict.fromkeys(task_ids))
+        placeholders = ",".join("?" * len(ids))
+        add = [tag for tag in (add or []) if tag]
+        remove = set(remove or [])
+        changed = 0
+        with self.transaction():
+            rows = self.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({placeholders})",
+                                     ids).fetchall()
+            for task in self._rows_to_tasks(rows):
+                tags = list(dict.fromkeys([tag for tag in task.tags if tag not in remove] + add))
+                if tags != task.tags:
+                    self._set_task_tags(task.id, tags)
+                    changed += 1
+        return changed
+
+
+    def bulk_move(self, task_ids: list, task_type: str):
+        """Moves many tasks to another type; returns how many moved.
+
+        Daily tasks have no deadline, so moving to daily clears it. Tasks whose
+        title is already taken in the other type stay where they are.
+        """
+
+        if task_type not in ['daily', 'overall']:
+            return 0
+        moved = 0
+        with self.transaction():
+            for task_id in dict.fromkeys(task_ids):
+                # one at a time, so tasks moved earlier count as taking their title
+                moved += self.conn.execute(
+                    "UPDATE tasks SET type = ?, deadline = CASE WHEN ? = 'daily' THEN NULL ELSE deadline END "
+                    "WHERE id = ? AND type != ? AND NOT EXISTS "
+                    "(SELECT 1 FROM tasks other WHERE other.type = ? AND other.title = tasks.title)",
+                    (task_type, task_type, task_id, task_type, task_type)).rowcount
+        return moved
+
+
+    # ==================================================================
+    # Getters/Checkers
+    #                           Functions:
+    # get_next_id() -> Returns the next available id.
+    # get_version() -> Returns the store version, which grows with every change.
+    # get_tags() -> Returns the list of tags.
+    # get_tasks_count() -> Returns the number of tasks of a given type.
+    # get_tasks_by_type() -> Returns the list of tasks of a given type.
+    # get_tasks_page() -> Returns a sorted page of tasks of a given type and the total count.
+    # get_task_by_id() -> Returns the task with the given id.
+    # is_new_task_unique() -> Checks if the new task is unique.
+    # is_title_taken() -> Checks if a task of the given type has the title.
+    # is_task_type_empty() -> Checks if the task type is empty.
+    # does_task_exist() -> Checks if the task exists.
+    # search_tasks() -> Returns the tasks matching a text query, best match first.
+    # get_overdue_tasks() -> Returns the unfinished tasks whose deadline has passed, oldest first.
+    # get_tasks_due_within() -> Returns the unfinished tasks due in the next hours, soonest first.
+    # get_next_deadlines() -> Returns the next unfinished tasks due, soonest first.
+    # iter_tasks() -> Yields the tasks matching the filters in id order, a batch at a time.
+    # _tasks_after() -> Returns the next tasks of a type after an id matching the filters, in id order.
+    # _get_open_deadlines() -> Returns unfinished tasks with a deadline in [start, end), soonest first.
+    # ==================================================================
+
+    @_locked
+    def get_next_id(self):
+        """Returns the next available id."""
+
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'latest_id'").fetchone()[0] + 1
+
+
+    @_locked
+    def get_version(self):
+        """Returns the store version, which grows with every change."""
+
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+
+    @_locked
+    def get_tags(self):
+        """Returns the list of tags."""
+
+        return [name for (name,) in self.conn.execute("SELECT name FROM tags ORDER BY id")]
+
+
+    @_locked
+    def get_tasks_count(self, task_type: str):
+        """Returns the number of tasks of a given type."""
+
+        return self.conn.execute("SELECT COUNT(*) FROM tasks WHERE type = ?", (task_type,)).fetchone()[0]
+
+
+    @_locked
+    def get_tasks_by_type(self, task_type: str):
+        """Returns the list of tasks of a given type."""
+
+        task_type = task_type.lower().strip()
+        if task_type in ['daily', 'overall']:
+            rows = self.conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE type = ? ORDER BY id", (task_type,)).fetchall()
+            return self._rows_to_tasks(rows)
+
+
+    @_locked
+    def get_tasks_page(self, task_type: str, sort_by: str = 'id', descending: bool = False,
+                       offset: int = 0, limit: int | None = None,
+                       tags: list | None = None, match_all: bool = True):
+        """Returns a sorted page of tasks of a given type and the total count.
+
+        With tags, only tasks carrying all of them (or any, if not match_all) are listed.
+        """
+
+        task_type = task_type.lower().strip()
+        if task_type not in ['daily', 'overall']:
+            return [], 0
+
+        where, params = "type = ?", [task_type]
+        if tags:
+            placeholders = ",".join("?" * len(tags))
+            where += (f" AND id IN (SELECT tt.task_id FROM task_tags tt JOIN tags t ON t.id = tt.tag_id "
+                      f"WHERE t.name IN ({placeholders}) GROUP BY tt.task_id HAVING COUNT(*) >= ?)")
+            params += list(tags) + [len(set(tags)) if match_all else 1]
+
+        direction = " DESC" if descending else ""
+        order_by = ", ".join(term + direction for term in SORT_COLUMNS.get(sort_by, SORT_COLUMNS['id']))
+        rows = self.conn.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else limit, offset]).fetchall()
+        total = self.conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
+        return self._rows_to_tasks(rows), total
+
+
+    @_locked
+    def get_task_by_id(self, task_id: int):
+        """Returns the task with the given id."""
+
+        row = self.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if row:
+            return self._rows_to_tasks([row])[0], row[1]
+        return None
+
+
+    @_locked
+    def is_new_task_unique(self, new_task: Task, task_type: str):
+        """Checks if a new task is unique (title or id)."""
+
+        row = self.conn.execute(
+            "SELECT 1 FROM tasks WHERE type = ? AND (title = ? OR id = ?) LIMIT 1",
+            (task_type, new_task.title, new_task.id)).fetchone()
+        return row is None
+
+
+    @_locked
+    def is_title_taken(self, task_type: str, title: str):
+        """Checks if a task of the given type has the title."""
+
+        return self.conn.execute("SELECT 1 FROM tasks WHERE type = ? AND title = ? LIMIT 1",
+                                 (task_type, title)).fetchone() is not None
+
+
+    @_locked
+    def is_task_type_empty(self, task_type: str):
+        """Checks if a task type is empty."""
+
+        return self.conn.execute(
+            "SELECT 1 FROM tasks WHERE type = ? LIMIT 1", (task_type,)).fetchone() is None
+
+
+    @_locked
+    def does_task_exist(self, task_id: int):
+        """Checks if a task with the given id exists."""
+
+        return self.conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is not None
+
+
+    @_locked
+    def search_tasks(self, query: str, task_type: str | None = None, limit: int | None = 50):
+        """Returns the tasks matching a text query, best match first.
+
+        Every query word must match a title or description word, or be a prefix of one.
+        """
+
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        where, params = "task_search MATCH ?", [" ".join(f'"{term}"*' for term in terms)]
+        if task_type:
+            where += " AND t.type = ?"
+            params.append(task_type)
+        columns = ", ".join("t." + column for column in TASK_COLUMNS.split(", "))
+        rows = self.conn.execute(
+            f"SELECT {columns} FROM task_search JOIN tasks t ON t.id = task_search.rowid "
+            f"WHERE {where} ORDER BY bm25(task_search, {float(TITLE_WEIGHT)}, 1.0), t.id LIMIT ?",
+            params + [-1 if limit is None else limit]).fetchall()
+        return self._rows_to_tasks(rows)
+
+
+    @_locked
+    def get_overdue_tasks(self, now: datetime | None = None, limit: int | None = None):
+        """Returns the unfinished tasks whose deadline has passed, oldest first."""
+
+        return self._get_open_deadlines(None, now or datetime.now(), limit)
+
+
+    @_locked
+    def get_tasks_due_within(self, hours: float, now: datetime | None = None, limit: int | None = None):
+        """Returns the unfinished tasks due in the next hours, soonest first."""
+
+        now = now or datetime.now()
+        return self._get_open_deadlines(now, now + timedelta(hours=hours), limit)
+
+
+    @_locked
+    def get_next_deadlines(self, count: int, now: datetime | None = None):
+        """Returns the next unfinished tasks due, soonest first."""
+
+        return self._get_open_deadlines(now or datetime.now(), None, count)
+
+
+    def _get_open_deadlines(self, start: datetime | None, end: datetime | None, limit: int | None):
+        """Returns unfinished tasks with a deadline in [start, end), soonest first."""
+
+        where, params = "finished = 0 AND deadline IS NOT NULL", []
+        if start:
+            where += " AND deadline >= ?"
+            params.append(format_datetime(start))
+        if end:
+            where += " AND deadline < ?"
+            params.append(format_datetime(end))
+        rows = self.conn.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE {where} ORDER BY deadline, id LIMIT ?",
+            params + [-1 if limit is None else limit]).fetchall()
+        return self._rows_to_tasks(rows)
+
+
+    def iter_tasks(self, task_type: str | None = None, tags: list | None = None,
+                   finished: bool | None = None, batch_size: int = 1000):
+        """Yields the tasks matching the filters in id order, a batch at a time.
+
+        Filters: one type, carrying all the tags, finished or not. Each batch
+        is its own query, so a long export does not hold the connection.
+        """
+
+        for current_type in [task_type] if task_type else ['daily', 'overall']:
+            after_id = 0
+            while True:
+                batch = self._tasks_after(current_type, after_id, batch_size, tags, finished)
+                if not batch:
+                    break
+                after_id = batch[-1].id
+                yield from batch
+
+
+    @_locked
+    def _tasks_after(self, task_type: str, after_id: int, limit: int,
+                     tags: list | None, finished: bool | None):
+        """Returns the next tasks of a type after an id matching the filters, in id order."""
+
+        where, params = "type = ? AND id > ?", [task_type, after_id]
+        if finished is not None:
+            where += " AND finished = ?"
+            params.append(int(finished))
+        for tag in dict.fromkeys(tags or []):
+            where += (" AND id IN (SELECT tt.task_id FROM task_tags tt JOIN tags t ON t.id = tt.tag_id "
+                      "WHERE t.name = ?)")
+            params.append(tag)
+        rows = self.conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE {where} ORDER BY id LIMIT ?",
+                                 params + [limit]).fetchall()
+        return self._rows_to_tasks(rows)
+
+
+# ==================================================================
+# Migration
+#                           Functions:
+# migrate_from_json() -> Copies every task from the JSON database into an empty SQLite database.
+# ==================================================================
+
+def migrate_from_json(db_file: str | None = None):
+    """Copies every task from the JSON database into an empty SQLite database."""
+
+    from task_logic.task_json import TaskJSON
+
+    source = TaskJSON()
+    target = TaskSQLite(db_file)
+    if not (target.is_task_type_empty('daily') and target.is_task_type_empty('overall')):
+        raise ValueError("SQLite database already has tasks; refusing to migrate over them.")
+
+    with target.conn:
+        for tag in source.get_tags():
+            target.conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag,))
+        for task_type in ['daily', 'overall']:
+            for task in source.get_tasks_by_type(task_type):
+                target._insert_task(task, task_type)
+        target.conn.execute("UPDATE meta SET value = ? WHERE key = 'latest_id'",
+                            (source.get_next_id() - 1,))
+        target.conn.execute("UPDATE meta SET value = ? WHERE key = 'version'", (source.get_version(),))
+    return target
+
+
+if __name__ == "__main__":
+    # python -m task_logic.task_sqlite [db_file]
+    migrated = migrate_from_json(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Migrated {migrated.get_tasks_count('daily')} daily and "
+          f"{migrated.get_tasks_count('overall')} overall tasks.")
@@ -0,0 +1,193 @@
+#                            TASK STORAGE INTERFACE (v1.0.0)
+
+import os
+from collections.abc import Iterator
+from contextlib import AbstractContextManager
+from datetime import datetime
+from typing import Protocol
+
+from task_logic.task import Task
+
+# Backend used by open_storage() when none is given: "json" or "sqlite".
+STORAGE_BACKEND = os.environ.get('TASK_STORAGE', 'json')
+# Directory the store keeps its files in (TASK_DATA_DIR); unset uses ./task_data.
+DATA_DIR = os.environ.get('TASK_DATA_DIR')
+# Seconds between group commits (TASK_GROUP_COMMIT); unset persists every change right away.
+GROUP_COMMIT_INTERVAL = float(os.environ['TASK_GROUP_COMMIT']) if os.environ.get('TASK_GROUP_COMMIT') else None
+# When writes are forced to disk (TASK_DURABILITY): "none" leaves it to the OS, "commit" fsyncs
+# every flush, "periodic" fsyncs at most once per interval and may lose that much on power loss.
+DURABILITY_LEVELS = ('none', 'commit', 'periodic')
+DURABILITY = os.environ.get('TASK_DURABILITY', 'none')
+# On-disk snapshot of the JSON store (TASK_SNAPSHOT): "json" (data.json, the default) or
+# "binary" (data.bin, opened through mmap; see task_binary).
+SNAPSHOT_FORMATS = ('json', 'binary')
+SNAPSHOT_FORMAT = os.environ.get('TASK_SNAPSHOT')
+# TASK_LAZY_LOAD=1 keeps task descriptions in the binary snapshot until they are read.
+# TASK_ARCHIVE_DAYS archives overall tasks finished that many days ago when the JSON store opens.
+ARCHIVE_AFTER_DAYS = float(os.environ['TASK_ARCHIVE_DAYS']) if os.environ.get('TASK_ARCHIVE_DAYS') else None
+LAZY_LOAD = os.environ.get('TASK_LAZY_LOAD', '').lower() in ('1', 'true', 'yes', 'on')
+
+class TaskStorage(Protocol):
+    """Operations both apps need from a task store (TaskJSON, TaskSQLite)."""
+
+    # ==================================================================
+    # Storage maintenance
+    # ==================================================================
+
+    def transaction(self) -> AbstractContextManager:
+        """Groups changes so they are persisted once, when the outermost block exits."""
+        ...
+
+    def flush(self):
+        """Persists every change that is not on disk yet."""
+        ...
+
+    # ==================================================================
+    # Task Operations
+    # ==================================================================
+
+    def add_task(self, new_task: Task, task_type: str):
+        """Adds a new task to the list of tasks."""
+        ...
+
+    def edit_task(self, edited_task: Task, task_type: str) -> bool:
+        """Edits an existing task; returns False if there is none or its new title is taken."""
+        ...
+
+    def delete_task(self, task_id: int, task_type: str):
+        """Deletes a task from the list of tasks."""
+        ...
+
+    def toggle_task_finished(self, task_id: int, task_type: str):
+        """Toggles the finished status of a task."""
+        ...
+
+    # ==================================================================
+    # Reset Operations
+    # ==================================================================
+
+    def reset_tasks(self, task_type: str):
+        """Resets all tasks of a given type (daily/overall) to empty list."""
+        ...
+
+    def reset_tags(self):
+        """Resets all tags to empty list."""
+        ...
+
+    def reset_daily_finished(self):
+        """Resets all daily tasks that were finished before today."""
+        ...
+
+    # ==================================================================
+    # Bulk Operations (one transaction each)
+    # ==================================================================
+
+    def bulk_toggle(self, task_ids: list, finished: bool | None = None) -> int:
+        """Toggles (or, given finished, sets) the finished status of many tasks; returns how many changed."""
+        ...
+
+    def bulk_delete(self, task_ids: list) -> int:
+        """Deletes many tasks; returns how many were deleted."""
+        ...
+
+    def bulk_retag(self, task_ids: list, add: list | None = None, remove: list | None = None) -> int:
+        """Adds and removes tags on many tasks; returns how many changed."""
+        ...
+
+    def bulk_move(self, task_ids: list, task_type: str) -> int:
+        """Moves many tasks to another type (clearing deadlines when moving to daily); returns how many moved."""
+        ...
+
+    # ==================================================================
+    # Getters/Checkers
+    # ==================================================================
+
+    def get_next_id(self) -> int:
+        """Returns the next available id."""
+        ...
+
+    def get_version(self) -> int:
+        """Returns the store version, which grows with every change."""
+        ...
+
+    def get_tags(self) -> list:
+        """Returns the list of tags."""
+        ...
+
+    def get_tasks_count(self, task_type: str) -> int:
+        """Returns the number of tasks of a given type."""
+        ...
+
+    def get_tasks_by_type(self, task_type: str) -> list | None:
+        """Returns the list of tasks of a given type."""
+        ...
+
+    def get_tasks_page(self, task_type: str, sort_by: str = 'id', descending: bool = False,
+                       offset: int = 0, limit: int | None = None,
+                       tags: list | None = None, match_all: bool = True) -> tuple[list, int]:
+        """Returns a sorted page of tasks of a given type (optionally matching tags) and the total count."""
+        ...
+
+    def get_task_by_id(self, task_id: int) -> tuple[Task, str] | None:
+        """Returns the task with the given id."""
+        ...
+
+    def is_new_task_unique(self, new_task: Task, task_type: str) -> bool:
+        """Checks if a new task is unique (title or id)."""
+        ...
+
+    def is_title_taken(self, task_type: str, title: str) -> bool:
+        """Checks if a task of the given type has the title."""
+        ...
+
+    def is_task_type_empty(self, task_type: str) -> bool:
+        """Checks if a task type is empty."""
+        ...
+
+    def does_task_exist(self, task_id: int) -> bool:
+        """Checks if a task with the given id exists."""
+        ...
+
+    def search_tasks(self, query: str, task_type: str | None = None, limit: int | None = 50) -> list:
+        """Returns the tasks matching a text query, best match first (archived ones only for ARCHIVE_TYPE)."""
+        ...
+
+    def get_overdue_tasks(self, now: datetime | None = None, limit: int | None = None) -> list:
+        """Returns the unfinished tasks whose deadline has passed, oldest first."""
+        ...
+
+    def get_tasks_due_within(self, hours: float, now: datetime | None = None,
+                             limit: int | None = None) -> list:
+        """Returns the unfinished tasks due in the next hours, soonest first."""
+        ...
+
+    def get_next_deadlines(self, count: int, now: datetime | None = None) -> list:
+        """Returns the next unfinished tasks due, soonest first."""
+        ...
+
+    def iter_tasks(self, task_type: str | None = None, tags: list | None = None,
+                   finished: bool | None = None, batch_size: int = 1000) -> Iterator[Task]:
+        """Yields the tasks matching the filters in id order, a batch at a time."""
+        ...
+
+
+def open_storage(backend: str | None = None, data_dir: str | None = None, **options) -> TaskStorage:
+    """Returns the task store for the configured backend.
+
+    data_dir overrides TASK_DATA_DIR, and options (durability=..., lazy=...)
+    override the other settings read from the environment.
+    """
+
+    backend = (backend or STORAGE_BACKEND).lower().strip()
+    data_dir = data_dir or DATA_DIR
+    if backend == 'json':
+        from task_logic.task_json import TaskJSON
+        settings = dict(group_commit_interval=GROUP_COMMIT_INTERVAL, durability=DURABILITY,
+                        snapshot_format=SNAPSHOT_FORMAT, lazy=LAZY_LOAD, archive_after_days=ARCHIVE_AFTER_DAYS)
+        return TaskJSON(data_dir=data_dir, **{**settings, **options})
+    if backend == 'sqlite':
+        from task_logic.task_sqlite import TaskSQLite
+        settings = dict(group_commit_interval=GROUP_COMMIT_INTERVAL, durability=DURABILITY)
+        db_file = os.path.join(data_dir, os.path.basename(TaskSQLite.DBFILE)) if data_dir else None
+        return TaskSQLite(db_file=db_file, **{**settings, **options})
+    raise ValueError(f"Unknown storage backend: {backend}")
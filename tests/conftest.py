@@ -0,0 +1,14 @@
+#                            TEST SETUP (v1.0.0)
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# app_gui opens a store when imported: keep it away from ./task_data
+if 'TASK_DATA_DIR' not in os.environ:
+    os.environ['TASK_DATA_DIR'] = tempfile.mkdtemp(prefix='task-tests-')
+    atexit.register(shutil.rmtree, os.environ['TASK_DATA_DIR'], ignore_errors=True)
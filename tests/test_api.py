@@ -0,0 +1,52 @@
+#                            TASK API TESTS (v1.0.0)
+#
+#   python -m pytest tests
+
+from datetime import datetime, timezone
+
+import pytest
+
+from task_logic.task_storage import open_storage
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Returns a test client of the app, with a store kept in a temporary directory."""
+
+    import app_gui
+    monkeypatch.setattr(app_gui, 'database', open_storage('json', str(tmp_path)))
+    app_gui.page_cache.clear()
+    app_gui.row_cache.clear()
+    return app_gui.app.test_client()
+
+
+def test_patch_to_a_taken_title_is_a_conflict(client):
+    client.post('/api/tasks', json={'type': 'overall', 'title': 'A'})
+    task_id = client.post('/api/tasks', json={'type': 'overall', 'title': 'B'}).json['id']
+
+    response = client.patch(f'/api/tasks/{task_id}', json={'title': 'A'})
+    assert response.status_code == 409
+    assert response.json == {'error': "A task with this title already exists"}
+    assert client.get(f'/api/tasks/{task_id}').json['title'] == 'B'
+
+
+def test_patch_keeping_the_title_succeeds(client):
+    task_id = client.post('/api/tasks', json={'type': 'overall', 'title': 'A'}).json['id']
+
+    response = client.patch(f'/api/tasks/{task_id}', json={'title': 'A', 'description': 'changed'})
+    assert response.status_code == 200
+    assert response.json['description'] == 'changed'
+
+
+def test_deadlines_with_a_utc_offset_are_kept_in_local_time(client):
+    deadline = datetime(2030, 1, 1, 12, 0, tzinfo=timezone.utc)
+    local = deadline.astimezone().strftime('%Y-%m-%dT%H:%M')
+    client.post('/api/tasks', json={'type': 'overall', 'title': 'naive', 'deadline': '2030-01-01T12:00'})
+    task_id = client.post('/api/tasks', json={'type': 'overall', 'title': 'A'}).json['id']
+
+    response = client.patch(f'/api/tasks/{task_id}', json={'deadline': '2030-01-01T12:00+00:00'})
+    assert response.status_code == 200
+    assert client.get(f'/api/tasks/{task_id}').json['deadline'] == local
+
+    line = '{"type": "overall", "title": "B", "deadline": "2030-01-01T12:00Z"}\n'
+    assert client.post('/api/tasks/import', data=line).json['imported'] == 1
+    assert client.get('/api/tasks?type=overall').json['tasks'][2]['deadline'] == local
@@ -0,0 +1,121 @@
+#                            JSON STORE TESTS (v1.0.0)
+#
+#   python -m pytest tests
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from task_logic.task import Task
+from task_logic.task_archive import ARCHIVE_TYPE
+from task_logic.task_json import SCHEMA_VERSION, TaskJSON
+
+@pytest.fixture
+def new_york(monkeypatch):
+    """Runs the test in a time zone with a UTC offset and DST changes."""
+
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_torn_journal_tail_is_dropped(tmp_path):
+    store = TaskJSON(data_dir=str(tmp_path))
+    store.add_task(Task('overall', 0, 'A', ''), 'overall')
+    with open(store.LOG_FILE, 'a') as f:
+        f.write('{"op": "add", "type": "overall", "task": {')  # an append cut short
+
+    store = TaskJSON(data_dir=str(tmp_path))
+    assert [task.title for task in store.get_tasks_by_type('overall')] == ['A']
+    store.add_task(Task('overall', 0, 'B', ''), 'overall')  # must not be swallowed by the torn record
+    assert [task.title for task in TaskJSON(data_dir=str(tmp_path)).get_tasks_by_type('overall')] == ['A', 'B']
+
+
+def test_schema_1_partitions_are_migrated(tmp_path):
+    os.makedirs(tmp_path / 'partitions')
+    write_json(tmp_path / 'partitions' / 'overall.1.json', [{
+        'type': 'overall', 'id': 1, 'title': 'A', 'description': '', 'tags': ['work'],
+        'deadline': '2030-03-10T02:30', 'created_at': '2030-01-01T10:00', 'finished': False, 'finished_at': None}])
+    write_json(tmp_path / 'partitions' / 'meta.json',
+               {'latest_id': 1, 'version': 1, 'tags': ['work'], 'partitions': {'overall': 'overall.1.json'}})
+
+    task, _ = TaskJSON(data_dir=str(tmp_path)).get_task_by_id(1)
+    assert (task.tags, task.deadline) == (['work'], datetime(2030, 3, 10, 2, 30))
+    assert read_json(tmp_path / 'partitions' / 'meta.json')['schema'] == SCHEMA_VERSION
+    task, _ = TaskJSON(data_dir=str(tmp_path)).get_task_by_id(1)
+    assert (task.tags, task.deadline) == (['work'], datetime(2030, 3, 10, 2, 30))
+
+
+def test_schema_2_partitions_and_journal_are_migrated(tmp_path, new_york):
+    deadline, created, finished = datetime(2030, 7, 1, 12, 0), datetime(2030, 1, 1, 10, 0), datetime(2030, 1, 2, 9, 0)
+    os.makedirs(tmp_path / 'partitions')
+    write_json(tmp_path / 'partitions' / 'overall.1.json', [{
+        'type': 'overall', 'id': 1, 'title': 'A', 'description': '', 'tags': [0],
+        'deadline': int(deadline.timestamp()), 'created_at': int(created.timestamp()),
+        'finished': False, 'finished_at': None}])
+    write_json(tmp_path / 'partitions' / 'meta.json', {'schema': 2, 'latest_id': 1, 'version': 1, 'tags': ['work'],
+                                                       'partitions': {'overall': 'overall.1.json'}})
+    with open(tmp_path / 'data.log', 'w') as f:
+        f.write(json.dumps({'op': 'finish', 'type': 'overall', 'id': 1, 'finished': True,
+                            'finished_at': int(finished.timestamp()), 'version': 2}) + '\n')
+
+    for _ in range(2):  # migrated, then read back in the new schema
+        task, _ = TaskJSON(data_dir=str(tmp_path)).get_task_by_id(1)
+        assert (task.tags, task.deadline, task.created_at) == (['work'], deadline, created)
+        assert (task.finished, task.finished_at) == (True, finished)
+    assert read_json(tmp_path / 'partitions' / 'meta.json')['schema'] == SCHEMA_VERSION
+    assert not os.path.exists(tmp_path / 'data.log')
+
+
+def test_replaced_partitions_are_removed(tmp_path, monkeypatch):
+    store = TaskJSON(data_dir=str(tmp_path))
+    store.add_task(Task('overall', 0, 'A', ''), 'overall')
+    store.compact()
+    old_file = store._partition_files['overall']
+
+    def still_mapped(path):  # as Windows refuses for a file another process has mapped
+        raise PermissionError(path)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(os, 'remove', still_mapped)
+        store.add_task(Task('overall', 0, 'B', ''), 'overall')
+        store._update_json()
+    assert os.path.exists(tmp_path / 'partitions' / old_file)
+
+    store.add_task(Task('overall', 0, 'C', ''), 'overall')
+    store.compact()  # retried after the next write
+    assert sorted(os.listdir(tmp_path / 'partitions')) == sorted(
+        ['meta.json', *store._partition_files.values()])
+    assert [task.title for task in TaskJSON(data_dir=str(tmp_path)).get_tasks_by_type('overall')] == ['A', 'B', 'C']
+
+
+def test_archived_tasks_stay_readable(tmp_path):
+    store = TaskJSON(data_dir=str(tmp_path))
+    long_ago = datetime.now() - timedelta(days=90)
+    store.add_task(Task('overall', 0, 'alpha old', '', finished=True, finished_at=long_ago), 'overall')
+    store.add_task(Task('overall', 0, 'alpha new', ''), 'overall')
+
+    assert store.archive_finished(older_than_days=30) == 1
+    for store in (store, TaskJSON(data_dir=str(tmp_path))):
+        assert [task.title for task in store.get_tasks_by_type('overall')] == ['alpha new']
+        assert store.get_archived_count() == 1
+        task, task_type = store.get_task_by_id(1)
+        assert (task.title, task_type) == ('alpha old', ARCHIVE_TYPE)
+        assert store.does_task_exist(1)
+        assert [task.title for task in store.search_tasks('alpha')] == ['alpha new']
+        assert [task.title for task in store.search_tasks('alpha', ARCHIVE_TYPE)] == ['alpha old']
@@ -0,0 +1,27 @@
+#                            TASK STORE TESTS (v1.0.0)
+#
+#   python -m pytest tests
+
+import pytest
+
+from task_logic.task import Task
+from task_logic.task_storage import open_storage
+
+@pytest.fixture(params=['json', 'sqlite'])
+def store(request, tmp_path):
+    """Returns an empty store of each backend, kept in a temporary directory."""
+
+    return open_storage(request.param, str(tmp_path))
+
+
+def test_edit_to_a_taken_title_is_rejected(store):
+    store.add_task(Task('overall', 0, 'A', ''), 'overall')
+    task = Task('overall', 0, 'B', '')
+    store.add_task(task, 'overall')
+
+    assert store.is_title_taken('overall', 'A')
+    assert not store.edit_task(Task('overall', task.id, 'A', 'changed'), 'overall')
+    assert store.get_task_by_id(task.id)[0].description == ''
+    assert store.edit_task(Task('overall', task.id, 'B', 'changed'), 'overall')
+    assert store.get_task_by_id(task.id)[0].description == 'changed'
+    assert not store.edit_task(Task('overall', 999, 'C', ''), 'overall')
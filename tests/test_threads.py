@@ -0,0 +1,35 @@
+#                            THREAD STRESS TESTS (v1.0.0)
+#
+# A scaled-down run of benchmarks/stress_threads.py on each backend.
+#
+#   python -m pytest tests
+
+import threading
+
+import pytest
+
+from benchmarks.stress_threads import check, worker
+from task_logic.task_storage import open_storage
+
+THREADS = 8
+TASKS = 25  # per thread
+
+@pytest.mark.parametrize('backend, options', [
+    ('json', {}),
+    ('json', {'group_commit_interval': 0.01}),
+    ('sqlite', {}),
+    ('sqlite', {'group_commit_interval': 0.01}),
+])
+def test_concurrent_writers_lose_nothing(tmp_path, backend, options):
+    store = open_storage(backend, str(tmp_path), **options)
+    results = {}
+    threads = [threading.Thread(target=worker, args=(store, n, TASKS, results)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+
+    assert len(results) == THREADS
+    assert check(store, results) == []
+    assert check(open_storage(backend, str(tmp_path)), results) == []